@@ -0,0 +1,88 @@
+"""
+Shared Pinecone and Groq clients
+One connection pool per service for the whole process: the RAG pipeline,
+health checks and the embeddings pipeline all reuse the same clients
+"""
+
+import threading
+from typing import Dict, Optional
+import httpx
+from pinecone import Pinecone
+from groq import AsyncGroq, Groq
+from config import Config
+
+# Pinecone gRPC transport (optional, falls back to the REST client)
+try:
+    from pinecone.grpc import PineconeGRPC
+    PINECONE_GRPC_AVAILABLE = True
+except ImportError:
+    PINECONE_GRPC_AVAILABLE = False
+
+# HTTP/2 for the Groq clients (optional, needs the h2 package from httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Threads (and pooled connections) the REST client uses for async_req calls
+PINECONE_POOL_THREADS = 32
+
+# Groq connection pool; idle connections are kept long enough to survive gaps between queries
+GROQ_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=120)
+GROQ_TIMEOUT = 30
+
+_lock = threading.Lock()
+_pinecone = None
+_groq = None
+_async_groq = None
+_indexes: Dict[str, object] = {}
+
+
+def get_pinecone() -> Pinecone:
+    """Process-wide Pinecone client, created on first use"""
+    global _pinecone
+    with _lock:
+        if _pinecone is None:
+            if PINECONE_GRPC_AVAILABLE:
+                _pinecone = PineconeGRPC(api_key=Config.PINECONE_API_KEY)
+            else:
+                _pinecone = Pinecone(api_key=Config.PINECONE_API_KEY, pool_threads=PINECONE_POOL_THREADS)
+                # urllib3 keeps 5 connections per CPU by default; any thread beyond that
+                # opens a fresh TLS connection per request and then discards it
+                _pinecone.openapi_config.connection_pool_maxsize = PINECONE_POOL_THREADS
+        return _pinecone
+
+
+def get_index(name: Optional[str] = None):
+    """Shared handle for a Pinecone index; raises NotFoundException if it does not exist"""
+    name = name or Config.PINECONE_INDEX_NAME
+    pc = get_pinecone()
+    with _lock:
+        if name not in _indexes:
+            _indexes[name] = pc.Index(name)
+        return _indexes[name]
+
+
+def get_groq() -> Groq:
+    """Process-wide Groq client, created on first use"""
+    global _groq
+    with _lock:
+        if _groq is None:
+            _groq = Groq(
+                api_key=Config.GROQ_API_KEY,
+                http_client=httpx.Client(http2=HTTP2_AVAILABLE, limits=GROQ_LIMITS, timeout=GROQ_TIMEOUT),
+            )
+        return _groq
+
+
+def get_async_groq() -> AsyncGroq:
+    """Process-wide AsyncGroq client; its connection pool belongs to the event loop that first uses it"""
+    global _async_groq
+    with _lock:
+        if _async_groq is None:
+            _async_groq = AsyncGroq(
+                api_key=Config.GROQ_API_KEY,
+                http_client=httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=GROQ_LIMITS, timeout=GROQ_TIMEOUT),
+            )
+        return _async_groq
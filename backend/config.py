@@ -10,6 +10,7 @@ class Config:
     # Pinecone Configuration
     PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
     PINECONE_INDEX_NAME = os.getenv('PINECONE_INDEX_NAME', 'magicbricks-properties')
+    PINECONE_ENVIRONMENT = os.getenv('PINECONE_ENVIRONMENT', 'us-east-1')  # Serverless region for new indexes
     
     # Groq Configuration
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
@@ -23,6 +24,8 @@ class Config:
     EMBEDDING_MODEL = 'llama-text-embed-v2'
     EMBEDDING_DIMENSION = 1024  # Llama text embed v2 dimension
     USE_PINECONE_EMBEDDINGS = True  # Use Pinecone Inference API
+    QUERY_EMBED_BATCH_SIZE = int(os.getenv('QUERY_EMBED_BATCH_SIZE', 32))  # Concurrent queries sharing one embed call
+    QUERY_EMBED_WAIT_MS = int(os.getenv('QUERY_EMBED_WAIT_MS', 15))  # How long a batch stays open for more queries
     
     # Scraping Configuration
     USER_AGENT = os.getenv('USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
@@ -32,16 +35,27 @@ class Config:
     # Data Processing
     CHUNK_SIZE = 512
     CHUNK_OVERLAP = 50
+    REINDEX = os.getenv('REINDEX', 'False').lower() == 'true'  # Re-embed and re-upsert chunks already in the index
     
     # RAG Configuration
     TOP_K_RESULTS = 5
     TEMPERATURE = 0.1  # Very low for factual responses
     MAX_TOKENS = 1024
+    MAX_CONTEXT_TOKENS = 1500  # Budget for retrieved property text in the prompt
+    MAX_CHUNK_TOKENS = 400  # Per-chunk cap so one long listing can't crowd out the rest
+    RESPONSE_CACHE_SIZE = 1024  # Repeated queries answered from memory
+    RESPONSE_CACHE_TTL = 3600  # seconds
+    SEMANTIC_CACHE_SIZE = 2048  # Recent query embeddings checked for near-duplicates
+    SEMANTIC_CACHE_THRESHOLD = 0.95  # Cosine similarity needed to reuse a cached answer
+    DISK_CACHE_SIZE_LIMIT = 2 ** 30  # bytes; LLM answers persisted across restarts
+    DISK_CACHE_TTL = 86400  # seconds
+    WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'True').lower() == 'true'  # Open connections before the first query
     
     # Paths
     DATA_DIR = 'data'
     RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw')
     PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
+    RESPONSE_CACHE_DIR = os.path.join(DATA_DIR, 'ragcache')
     
     @classmethod
     def validate(cls):
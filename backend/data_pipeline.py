@@ -4,16 +4,35 @@ Combines scraping, processing, and embedding generation in one file
 """
 
 import requests
+import httpx
 from bs4 import BeautifulSoup
+import asyncio
+import hashlib
 import json
+import logging
+import mmap
+import re
+import sys
 import time
 import os
-from typing import List, Dict, Optional
+import queue
+import threading
+from typing import List, Dict, Iterable, Iterator, Optional
+from dataclasses import dataclass, field, fields, asdict, is_dataclass
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from itertools import chain, islice
 from tqdm import tqdm
+from tenacity import retry, stop_after_attempt, wait_random_exponential
+import numpy as np
 import pandas as pd
-from pinecone import Pinecone, ServerlessSpec
+from pinecone import ServerlessSpec
+from pinecone.exceptions import NotFoundException
 from config import Config
+from clients import HTTP2_AVAILABLE, PINECONE_GRPC_AVAILABLE, PINECONE_POOL_THREADS, get_index, get_pinecone
+from filters import locality, price_in_lakh
 
 # Apify support (optional)
 try:
@@ -23,6 +42,202 @@ except ImportError:
     APIFY_AVAILABLE = False
     print("⚠️  apify-client not installed. Real scraping disabled.")
 
+# selectolax support (optional, falls back to BeautifulSoup)
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+# orjson support (optional, falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# ijson support (optional, streams processed chunks instead of loading the whole file)
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Sentence boundaries tried by chunk_text, in priority order
+CHUNK_BOUNDARIES = ['. ', '.\n', '! ', '?\n']
+
+# (field, label) pairs for property summaries, in output order
+SUMMARY_HEAD_FIELDS = [('title', "Property: "), ('price', "Price: "), ('location', "Location: ")]
+SUMMARY_DETAIL_FIELDS = [('property_type', "Type: "), ('bedrooms', ""), ('bathrooms', ""), ('area', "Area: ")]
+SUMMARY_TAIL_FIELDS = [
+    ('builder', "Builder: "), ('description', "Description: "), ('amenities', "Amenities: "),
+    ('locality_info', "Locality: "), ('url', "URL: "),
+]
+SUMMARY_CLEANED_FIELDS = ('description', 'locality_info')
+
+# Any run of whitespace (including newlines) collapses to a single space in clean_text
+_WS_RE = re.compile(r"\s+")
+
+# Property fields copied into each vector's Pinecone metadata
+VECTOR_METADATA_FIELDS = ('title', 'location', 'price', 'property_type', 'bedrooms', 'area', 'property_url')
+
+# Upsert requests kept in flight at once by upload_to_pinecone, one per REST pool thread
+UPSERT_CONCURRENCY = PINECONE_POOL_THREADS
+
+# Embedding arrays are float32 on gRPC, which sends float32 on the wire. The REST client
+# re-serializes values as JSON, where float32 values print as long noisy doubles
+EMBEDDING_DTYPE = np.float32 if PINECONE_GRPC_AVAILABLE else np.float64
+
+# Texts per Inference API embed request, and parsed batches buffered ahead of it
+EMBED_BATCH_SIZE = 96
+EMBED_QUEUE_SIZE = 500
+
+# Batches are shrunk so roughly this many tokens go in one embed request
+EMBED_BATCH_TOKENS = 8192
+EMBED_MIN_BATCH_SIZE = 8
+
+# Attempts per batch when an upsert fails, with jittered exponential backoff between them
+UPSERT_ATTEMPTS = 5
+
+# Pinecone caps a single fetch request at 1000 IDs
+FETCH_BATCH_SIZE = 1000
+
+# Seconds to wait for a newly created index to report ready
+INDEX_READY_TIMEOUT = 300
+
+# Pinecone caps a single delete request at 1000 IDs
+DELETE_BATCH_SIZE = 1000
+
+# Stored with every vector; bump it when _vector_metadata changes so existing vectors are re-upserted
+VECTOR_SCHEMA_VERSION = 2
+
+# Prefix of the positional chunk_<n>_<url slug> IDs the original pipeline wrote
+LEGACY_ID_PREFIX = 'chunk_'
+
+# Properties are summarized and chunked this many at a time, so streamed input stays bounded
+PROCESS_BATCH_SIZE = 1000
+
+# CSS selectors for fields on a property details page (Apify field names)
+PAGE_SELECTORS = {
+    'title': 'h1.title',
+    'price': '.price',
+    'location': '.location',
+    'propertyType': '.property-type',
+    'bedrooms': '.bhk',
+    'bathrooms': '.bathrooms',
+    'area': '.area',
+    'description': '.description',
+    'builder': '.builder-name',
+    'localityInfo': '.about-locality',
+}
+
+
+# ============================================================================
+# JSON I/O
+# ============================================================================
+
+def _dump_json(data, filepath: str):
+    """Write data to filepath as indented UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=_json_default)
+
+
+def _json_default(obj):
+    """Serialize dataclass records for the stdlib json fallback"""
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _latest_json_file(directory: str) -> Optional[str]:
+    """Return the most recently modified .json file in directory, or None"""
+    with os.scandir(directory) as entries:
+        latest = max(
+            (e for e in entries if e.name.endswith('.json') and e.is_file()),
+            key=lambda e: e.stat().st_mtime,
+            default=None,
+        )
+    return latest.path if latest else None
+
+
+def _load_json(filepath: str):
+    """Read JSON from filepath"""
+    if ORJSON_AVAILABLE:
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return orjson.loads(b"")  # mmap can't map an empty file; raise orjson's decode error
+            # Parse straight from the mapped pages instead of reading into an intermediate bytes copy
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ============================================================================
+# PROPERTY RECORD
+# ============================================================================
+
+@dataclass(slots=True)
+class Property:
+    """A single property listing; missing fields are empty strings, not 'N/A'"""
+    url: str = ""
+    scraped_at: str = ""
+    title: str = ""
+    price: str = ""
+    location: str = ""
+    property_type: str = ""
+    bedrooms: str = ""
+    bathrooms: str = ""
+    area: str = ""
+    amenities: List[str] = field(default_factory=list)
+    description: str = ""
+    builder: str = ""
+    locality_info: str = ""
+    
+    def __post_init__(self):
+        # Low-cardinality values repeat across thousands of listings; share one str object each
+        for name in INTERNED_FIELDS:
+            val = getattr(self, name)
+            if val and isinstance(val, str):
+                setattr(self, name, sys.intern(val))
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Property":
+        """Build from a raw record, mapping the scraper's 'N/A' sentinel to ''"""
+        return cls(**{
+            name: "" if data[name] == "N/A" else data[name]
+            for name in PROPERTY_FIELDS if name in data
+        })
+
+
+PROPERTY_FIELDS = tuple(f.name for f in fields(Property))
+INTERNED_FIELDS = ('property_type', 'bedrooms', 'bathrooms', 'location', 'builder', 'price')
+
+
+# ============================================================================
+# SAMPLE DATA
+# ============================================================================
+
+SAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'samples.json')
+
+# Sample listings are static, so one timestamp per process is enough
+_SAMPLES_SCRAPED_AT = datetime.now().isoformat()
+
+
+@lru_cache(maxsize=1)
+def _load_samples() -> tuple:
+    """Load the bundled sample properties once per process"""
+    return tuple(
+        Property.from_dict({**p, 'scraped_at': _SAMPLES_SCRAPED_AT})
+        for p in _load_json(SAMPLES_PATH)
+    )
+
 
 # ============================================================================
 # SCRAPER
@@ -57,11 +272,25 @@ class MagicbricksScraper:
             self.apify_client = None
             print("⚠️  Apify not configured - Using sample data fallback")
     
-    def scrape_with_apify(self, urls: List[str]) -> List[Dict]:
+    def scrape_with_apify(self, urls: List[str]) -> List[Property]:
         """Scrape properties using Apify actor"""
         if not self.apify_client:
             raise RuntimeError("Apify client not initialized")
         
+        try:
+            properties = list(self.stream_apify(urls))
+            print(f"✅ Scraped {len(properties)} properties via Apify")
+            return properties
+            
+        except Exception as e:
+            print(f"❌ Apify error: {e}")
+            return []
+    
+    def stream_apify(self, urls: List[str]) -> Iterator[Property]:
+        """Run the Apify actor and yield properties as its dataset is paged"""
+        if not self.apify_client:
+            raise RuntimeError("Apify client not initialized")
+        
         print(f"🚀 Starting Apify scraping for {len(urls)} URLs...")
         
         run_input = {
@@ -74,278 +303,104 @@ class MagicbricksScraper:
             },
         }
         
-        try:
-            run = self.apify_client.actor("ecomscrape/magicbricks-property-details-page-scraper").call(
-                run_input=run_input
-            )
-            
-            dataset_id = run["defaultDatasetId"]
-            print(f"💾 Data: https://console.apify.com/storage/datasets/{dataset_id}")
-            
-            properties = []
-            for item in self.apify_client.dataset(dataset_id).iterate_items():
-                property_data = self._transform_apify_data(item)
-                properties.append(property_data)
+        run = self.apify_client.actor("ecomscrape/magicbricks-property-details-page-scraper").call(
+            run_input=run_input
+        )
+        
+        dataset_id = run["defaultDatasetId"]
+        print(f"💾 Data: https://console.apify.com/storage/datasets/{dataset_id}")
+        
+        scraped_at = datetime.now().isoformat()
+        for item in self.apify_client.dataset(dataset_id).iterate_items():
+            yield self._transform_apify_data(item, scraped_at)
+    
+    async def scrape_urls_async(self, urls: List[str]) -> List[Property]:
+        """Fetch and parse property pages concurrently over one shared client (HTTP/2 when h2 is installed)"""
+        print(f"🚀 Fetching {len(urls)} property pages...")
+        
+        scraped_at = datetime.now().isoformat()
+        limits = httpx.Limits(max_connections=32)
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits, headers=self.headers,
+                                     timeout=30, follow_redirects=True) as client:
             
-            print(f"✅ Scraped {len(properties)} properties via Apify")
-            return properties
+            async def fetch(url: str) -> Optional[Property]:
+                try:
+                    resp = await client.get(url)
+                    resp.raise_for_status()
+                except httpx.HTTPError as e:
+                    print(f"❌ Failed to fetch {url}: {e}")
+                    return None
+                item = self._parse_html(resp.text)
+                if not item:
+                    print(f"❌ No listing fields found on {url}")
+                    return None
+                item['url'] = url
+                return self._transform_apify_data(item, scraped_at)
             
-        except Exception as e:
-            print(f"❌ Apify error: {e}")
-            return []
+            results = await asyncio.gather(*[fetch(url) for url in urls])
+        
+        properties = [p for p in results if p]
+        print(f"✅ Scraped {len(properties)} properties directly")
+        return properties
+    
+    def _parse_html(self, html: str) -> Dict:
+        """Extract listing fields from a property details page"""
+        if not SELECTOLAX_AVAILABLE:
+            return self._parse_html_bs4(html)
+        
+        tree = HTMLParser(html)
+        
+        item = {}
+        for field, selector in PAGE_SELECTORS.items():
+            node = tree.css_first(selector)
+            if node:
+                item[field] = node.text(separator=" ", strip=True)
+        
+        amenities = [li.text(separator=" ", strip=True) for li in tree.css("li.amenity")]
+        if amenities:
+            item['amenities'] = amenities
+        
+        return item
+    
+    def _parse_html_bs4(self, html: str) -> Dict:
+        """BeautifulSoup fallback for _parse_html"""
+        soup = BeautifulSoup(html, "lxml")
+        
+        item = {}
+        for field, selector in PAGE_SELECTORS.items():
+            node = soup.select_one(selector)
+            if node:
+                item[field] = node.get_text(" ", strip=True)
+        
+        amenities = [li.get_text(" ", strip=True) for li in soup.select("li.amenity")]
+        if amenities:
+            item['amenities'] = amenities
+        
+        return item
     
-    def _transform_apify_data(self, apify_item: Dict) -> Dict:
+    def _transform_apify_data(self, apify_item: Dict, scraped_at: str = None) -> Property:
         """Transform Apify data to standard format"""
-        return {
+        if scraped_at is None:
+            scraped_at = datetime.now().isoformat()
+        return Property.from_dict({
             'url': apify_item.get('url', ''),
-            'scraped_at': datetime.now().isoformat(),
-            'title': apify_item.get('title', apify_item.get('propertyName', 'N/A')),
-            'price': apify_item.get('price', 'N/A'),
-            'location': apify_item.get('location', apify_item.get('locality', 'N/A')),
-            'property_type': apify_item.get('propertyType', 'N/A'),
-            'bedrooms': apify_item.get('bedrooms', apify_item.get('bhkType', 'N/A')),
-            'bathrooms': apify_item.get('bathrooms', 'N/A'),
-            'area': apify_item.get('area', apify_item.get('carpetArea', 'N/A')),
+            'scraped_at': scraped_at,
+            'title': apify_item.get('title', apify_item.get('propertyName', '')),
+            'price': apify_item.get('price', ''),
+            'location': apify_item.get('location', apify_item.get('locality', '')),
+            'property_type': apify_item.get('propertyType', ''),
+            'bedrooms': apify_item.get('bedrooms', apify_item.get('bhkType', '')),
+            'bathrooms': apify_item.get('bathrooms', ''),
+            'area': apify_item.get('area', apify_item.get('carpetArea', '')),
             'amenities': apify_item.get('amenities', []),
-            'description': apify_item.get('description', apify_item.get('propertyDescription', 'N/A')),
-            'builder': apify_item.get('builder', apify_item.get('builderName', 'N/A')),
-            'locality_info': apify_item.get('localityInfo', apify_item.get('aboutLocality', 'N/A')),
-        }
+            'description': apify_item.get('description', apify_item.get('propertyDescription', '')),
+            'builder': apify_item.get('builder', apify_item.get('builderName', '')),
+            'locality_info': apify_item.get('localityInfo', apify_item.get('aboutLocality', '')),
+        })
     
-    def get_sample_properties(self) -> List[Dict]:
-        """Generate sample property data - 15 diverse Bangalore properties"""
-        return [
-            # Premium properties
-            {
-                'url': 'https://www.magicbricks.com/property-sample-1',
-                'scraped_at': datetime.now().isoformat(),
-                'title': 'Luxury 3BHK Apartment in Whitefield, Bangalore',
-                'price': '₹ 1.2 Cr',
-                'location': 'Whitefield, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '3 BHK',
-                'bathrooms': '3 Bathrooms',
-                'area': '1650 sq.ft',
-                'amenities': ['Swimming Pool', 'Gym', 'Club House', 'Power Backup', 'Parking', 'Security', 'Lift'],
-                'description': 'Premium 3BHK apartment in Whitefield with modern amenities. Close to IT parks, schools, and shopping centers.',
-                'builder': 'Prestige Group',
-                'locality_info': 'Whitefield is a major IT hub with excellent infrastructure.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-2',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '2BHK Flat in Electronic City, Bangalore',
-                'price': '₹ 75 Lakh',
-                'location': 'Electronic City, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '2 BHK',
-                'bathrooms': '2 Bathrooms',
-                'area': '1100 sq.ft',
-                'amenities': ['Gym', 'Power Backup', 'Parking', 'Security', 'Children Play Area'],
-                'description': 'Spacious 2BHK apartment in Electronic City Phase 1. Near major IT companies.',
-                'builder': 'Brigade Group',
-                'locality_info': "Electronic City is Bangalore's largest IT park.",
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-3',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '4BHK Villa in Sarjapur Road, Bangalore',
-                'price': '₹ 2.5 Cr',
-                'location': 'Sarjapur Road, Bangalore',
-                'property_type': 'Villa',
-                'bedrooms': '4 BHK',
-                'bathrooms': '4 Bathrooms',
-                'area': '2800 sq.ft',
-                'amenities': ['Private Garden', 'Swimming Pool', 'Gym', 'Club House', 'Power Backup', 'Parking', '24x7 Security', 'Gated Community'],
-                'description': 'Luxurious 4BHK villa with private garden and premium fittings. Perfect for families.',
-                'builder': 'Sobha Developers',
-                'locality_info': 'Sarjapur Road is rapidly developing with excellent IT parks and schools.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-4',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '3BHK Apartment in Indiranagar, Bangalore',
-                'price': '₹ 2.1 Cr',
-                'location': 'Indiranagar, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '3 BHK',
-                'bathrooms': '3 Bathrooms',
-                'area': '1800 sq.ft',
-                'amenities': ['Gym', 'Club House', 'Power Backup', 'Parking', 'Lift', 'Intercom', 'Piped Gas'],
-                'description': 'Premium apartment in the heart of Indiranagar. Walking distance to restaurants and cafes.',
-                'builder': 'Shriram Properties',
-                'locality_info': 'Indiranagar is one of Bangalore\'s most sought-after neighborhoods.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-5',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '1BHK Studio Apartment in Koramangala, Bangalore',
-                'price': '₹ 55 Lakh',
-                'location': 'Koramangala, Bangalore',
-                'property_type': 'Studio Apartment',
-                'bedrooms': '1 BHK',
-                'bathrooms': '1 Bathroom',
-                'area': '650 sq.ft',
-                'amenities': ['Power Backup', 'Parking', 'Security', 'Lift'],
-                'description': 'Compact studio apartment perfect for young professionals. Located in the startup hub.',
-                'builder': 'Purva Properties',
-                'locality_info': 'Koramangala is Bangalore\'s startup district with numerous cafes and restaurants.',
-            },
-            # Mid-range properties
-            {
-                'url': 'https://www.magicbricks.com/property-sample-6',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '2BHK Apartment in HSR Layout, Bangalore',
-                'price': '₹ 95 Lakh',
-                'location': 'HSR Layout, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '2 BHK',
-                'bathrooms': '2 Bathrooms',
-                'area': '1200 sq.ft',
-                'amenities': ['Gym', 'Swimming Pool', 'Power Backup', 'Parking', 'Security', 'Lift', 'Club House'],
-                'description': 'Well-maintained 2BHK in HSR Layout Sector 2. Great connectivity to ORR and metro.',
-                'builder': 'Sobha Developers',
-                'locality_info': 'HSR Layout is a well-developed residential area with excellent amenities.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-7',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '3BHK Penthouse in JP Nagar, Bangalore',
-                'price': '₹ 1.8 Cr',
-                'location': 'JP Nagar, Bangalore',
-                'property_type': 'Penthouse',
-                'bedrooms': '3 BHK',
-                'bathrooms': '3 Bathrooms',
-                'area': '2200 sq.ft',
-                'amenities': ['Private Terrace', 'Swimming Pool', 'Gym', 'Club House', 'Power Backup', 'Parking', 'Security'],
-                'description': 'Stunning penthouse with private terrace and city views. Premium fittings throughout.',
-                'builder': 'Puravankara',
-                'locality_info': 'JP Nagar is a mature residential area with excellent schools and hospitals.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-8',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '2BHK Flat in Marathahalli, Bangalore',
-                'price': '₹ 68 Lakh',
-                'location': 'Marathahalli, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '2 BHK',
-                'bathrooms': '2 Bathrooms',
-                'area': '950 sq.ft',
-                'amenities': ['Power Backup', 'Parking', 'Security', 'Lift', 'Children Play Area'],
-                'description': 'Affordable 2BHK near Marathahalli Bridge. Close to offices and tech parks.',
-                'builder': 'Salarpuria Sattva',
-                'locality_info': 'Marathahalli is a bustling IT hub with great connectivity.',
-            },
-            # Budget-friendly options
-            {
-                'url': 'https://www.magicbricks.com/property-sample-9',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '1BHK Apartment in Bommanahalli, Bangalore',
-                'price': '₹ 42 Lakh',
-                'location': 'Bommanahalli, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '1 BHK',
-                'bathrooms': '1 Bathroom',
-                'area': '580 sq.ft',
-                'amenities': ['Power Backup', 'Parking', 'Security'],
-                'description': 'Compact 1BHK apartment near Electronic City. Ideal for first-time buyers.',
-                'builder': 'Mantri Developers',
-                'locality_info': 'Bommanahalli offers affordable housing near Electronic City.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-10',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '2BHK Flat in BTM Layout, Bangalore',
-                'price': '₹ 85 Lakh',
-                'location': 'BTM Layout, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '2 BHK',
-                'bathrooms': '2 Bathrooms',
-                'area': '1050 sq.ft',
-                'amenities': ['Gym', 'Power Backup', 'Parking', 'Security', 'Lift'],
-                'description': 'Well-located 2BHK in BTM 2nd Stage. Near metro station and shopping centers.',
-                'builder': 'Prestige Group',
-                'locality_info': 'BTM Layout is a established residential area with good infrastructure.',
-            },
-            # Luxury segment
-            {
-                'url': 'https://www.magicbricks.com/property-sample-11',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '4BHK Luxury Apartment in Bellandur, Bangalore',
-                'price': '₹ 3.2 Cr',
-                'location': 'Bellandur, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '4 BHK',
-                'bathrooms': '4 Bathrooms',
-                'area': '3200 sq.ft',
-                'amenities': ['Private Pool', 'Home Theater', 'Gym', 'Club House', 'Concierge Service', 'Power Backup', 'Parking', '24x7 Security', 'Smart Home'],
-                'description': 'Ultra-luxury 4BHK with private pool and smart home features. Premium lake-facing views.',
-                'builder': 'Embassy Group',
-                'locality_info': 'Bellandur is a premium residential area near major IT parks.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-12',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '3BHK Apartment in Hebbal, Bangalore',
-                'price': '₹ 1.5 Cr',
-                'location': 'Hebbal, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '3 BHK',
-                'bathrooms': '3 Bathrooms',
-                'area': '1750 sq.ft',
-                'amenities': ['Swimming Pool', 'Gym', 'Club House', 'Power Backup', 'Parking', 'Security', 'Sports Court'],
-                'description': 'Spacious 3BHK near Manyata Tech Park. Excellent for IT professionals.',
-                'builder': 'Brigade Group',
-                'locality_info': 'Hebbal is rapidly developing with excellent connectivity to airport.',
-            },
-            # More variety
-            {
-                'url': 'https://www.magicbricks.com/property-sample-13',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '2BHK Flat in Yelahanka, Bangalore',
-                'price': '₹ 62 Lakh',
-                'location': 'Yelahanka, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '2 BHK',
-                'bathrooms': '2 Bathrooms',
-                'area': '980 sq.ft',
-                'amenities': ['Power Backup', 'Parking', 'Security', 'Lift', 'Children Play Area'],
-                'description': 'Affordable 2BHK near Yelahanka metro. Close to schools and hospitals.',
-                'builder': 'Mahindra Lifespaces',
-                'locality_info': 'Yelahanka offers good connectivity to airport and city center.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-14',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '3BHK Villa in Hennur Road, Bangalore',
-                'price': '₹ 1.9 Cr',
-                'location': 'Hennur Road, Bangalore',
-                'property_type': 'Villa',
-                'bedrooms': '3 BHK',
-                'bathrooms': '3 Bathrooms',
-                'area': '2100 sq.ft',
-                'amenities': ['Private Garden', 'Swimming Pool', 'Gym', 'Club House', 'Power Backup', 'Parking', 'Gated Community'],
-                'description': 'Beautiful villa with private garden. Perfect for families seeking peace.',
-                'builder': 'Shriram Properties',
-                'locality_info': 'Hennur Road is emerging as a premium residential corridor.',
-            },
-            {
-                'url': 'https://www.magicbricks.com/property-sample-15',
-                'scraped_at': datetime.now().isoformat(),
-                'title': '2BHK Apartment in Bannerghatta Road, Bangalore',
-                'price': '₹ 78 Lakh',
-                'location': 'Bannerghatta Road, Bangalore',
-                'property_type': 'Apartment',
-                'bedrooms': '2 BHK',
-                'bathrooms': '2 Bathrooms',
-                'area': '1080 sq.ft',
-                'amenities': ['Gym', 'Power Backup', 'Parking', 'Security', 'Lift', 'Landscaped Gardens'],
-                'description': 'Well-designed 2BHK with modern amenities. Near IIM Bangalore.',
-                'builder': 'Sobha Developers',
-                'locality_info': 'Bannerghatta Road is a well-connected area with good social infrastructure.',
-            }
-        ]
+    def get_sample_properties(self) -> List[Property]:
+        """Load sample property data - 15 diverse Bangalore properties"""
+        return list(_load_samples())
     
     def save_to_json(self, filename: str = None):
         """Save scraped data to JSON file"""
@@ -356,8 +411,7 @@ class MagicbricksScraper:
         filepath = os.path.join(Config.RAW_DATA_DIR, filename)
         os.makedirs(Config.RAW_DATA_DIR, exist_ok=True)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.properties, f, ensure_ascii=False, indent=2)
+        _dump_json(self.properties, filepath)
         
         print(f"Saved {len(self.properties)} properties to {filepath}")
         return filepath
@@ -373,18 +427,18 @@ class DataProcessor:
     def __init__(self):
         self.raw_data = []
         self.processed_chunks = []
+        self.property_metadata: Dict[str, Dict] = {}
     
     def load_raw_data(self, filepath: str = None):
         """Load raw scraped data"""
         if filepath is None:
-            files = [f for f in os.listdir(Config.RAW_DATA_DIR) if f.endswith('.json')]
-            if not files:
+            filepath = _latest_json_file(Config.RAW_DATA_DIR)
+            if filepath is None:
                 raise FileNotFoundError("No JSON files found in raw data directory")
-            filepath = os.path.join(Config.RAW_DATA_DIR, sorted(files)[-1])
         
         print(f"Loading data from: {filepath}")
-        with open(filepath, 'r', encoding='utf-8') as f:
-            self.raw_data = json.load(f)
+        # Property.from_dict canonicalizes "N/A" so summaries only need a truthiness check
+        self.raw_data = [Property.from_dict(p) for p in _load_json(filepath)]
         
         print(f"Loaded {len(self.raw_data)} properties")
         return self.raw_data
@@ -393,53 +447,30 @@ class DataProcessor:
         """Clean and normalize text"""
         if not text or text == "N/A":
             return ""
-        text = ' '.join(text.split())
-        text = text.replace('\n', ' ').replace('\r', ' ')
-        return text.strip()
+        return _WS_RE.sub(" ", text).strip()
     
-    def create_property_summary(self, property_data: Dict) -> str:
+    def create_property_summary(self, property_data: Property) -> str:
         """Create comprehensive text summary"""
-        parts = []
-        
-        if property_data.get('title'):
-            parts.append(f"Property: {property_data['title']}")
-        
-        if property_data.get('price') and property_data['price'] != "N/A":
-            parts.append(f"Price: {property_data['price']}")
-        
-        if property_data.get('location') and property_data['location'] != "N/A":
-            parts.append(f"Location: {property_data['location']}")
-        
-        details = []
-        if property_data.get('property_type') and property_data['property_type'] != "N/A":
-            details.append(f"Type: {property_data['property_type']}")
-        if property_data.get('bedrooms') and property_data['bedrooms'] != "N/A":
-            details.append(property_data['bedrooms'])
-        if property_data.get('bathrooms') and property_data['bathrooms'] != "N/A":
-            details.append(property_data['bathrooms'])
-        if property_data.get('area') and property_data['area'] != "N/A":
-            details.append(f"Area: {property_data['area']}")
+        return "\n".join(self._summary_lines(property_data))
+    
+    def _summary_lines(self, property_data: Property):
+        """Yield the non-empty labelled lines of a property summary"""
+        for key, label in SUMMARY_HEAD_FIELDS:
+            if val := getattr(property_data, key):
+                yield f"{label}{val}"
         
+        details = ", ".join(f"{label}{val}" for key, label in SUMMARY_DETAIL_FIELDS if (val := getattr(property_data, key)))
         if details:
-            parts.append("Details: " + ", ".join(details))
-        
-        if property_data.get('builder') and property_data['builder'] != "N/A":
-            parts.append(f"Builder: {property_data['builder']}")
-        
-        if property_data.get('description') and property_data['description'] != "N/A":
-            parts.append(f"Description: {self.clean_text(property_data['description'])}")
-        
-        if property_data.get('amenities') and property_data['amenities']:
-            amenities_text = ", ".join(property_data['amenities'])
-            parts.append(f"Amenities: {amenities_text}")
-        
-        if property_data.get('locality_info') and property_data['locality_info'] != "N/A":
-            parts.append(f"Locality: {self.clean_text(property_data['locality_info'])}")
-        
-        if property_data.get('url'):
-            parts.append(f"URL: {property_data['url']}")
+            yield "Details: " + details
         
-        return "\n".join(parts)
+        for key, label in SUMMARY_TAIL_FIELDS:
+            if not (val := getattr(property_data, key)):
+                continue
+            if key in SUMMARY_CLEANED_FIELDS:
+                val = self.clean_text(val)
+            elif key == 'amenities':
+                val = ", ".join(val)
+            yield f"{label}{val}"
     
     def chunk_text(self, text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
         """Split text into overlapping chunks"""
@@ -451,65 +482,114 @@ class DataProcessor:
         if len(text) <= chunk_size:
             return [text]
         
+        spans = self._chunk_spans(text, chunk_size, overlap)
+        
         chunks = []
+        for start, end in spans:
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+        
+        return chunks
+    
+    def _chunk_spans(self, text: str, chunk_size: int, overlap: int) -> List[tuple]:
+        """(start, end) offsets of each chunk, preferring sentence boundaries"""
+        # str.rfind already scans in C; a Numba kernel over the code points measured 2-3x slower
+        threshold = chunk_size * 0.7
+        spans = []
         start = 0
         
         while start < len(text):
             end = start + chunk_size
             
             if end < len(text):
-                for punct in ['. ', '.\n', '! ', '?\n']:
-                    last_punct = text[start:end].rfind(punct)
-                    if last_punct > chunk_size * 0.7:
-                        end = start + last_punct + len(punct)
+                for punct in CHUNK_BOUNDARIES:
+                    # Bounded rfind searches the window in place instead of slicing a copy;
+                    # a translate()+rfind single pass would copy the window twice and
+                    # loses the boundary priority order
+                    last_punct = text.rfind(punct, start, end)
+                    if last_punct - start > threshold:
+                        end = last_punct + len(punct)
                         break
             
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
+            spans.append((start, end))
             
             start = end - overlap if end < len(text) else end
         
-        return chunks
+        return spans
     
-    def create_chunks_with_metadata(self, property_data: Dict) -> List[Dict]:
-        """Create chunks with metadata"""
+    def create_chunks_with_metadata(self, property_data: Property, position: int = 0) -> List[Dict]:
+        """Create chunks; property metadata is stored once in self.property_metadata
+        
+        Metadata is keyed by URL plus the property's position in the run, so
+        listings with a missing or repeated URL keep their own metadata.
+        """
         full_text = self.create_property_summary(property_data)
         text_chunks = self.chunk_text(full_text)
         
-        chunks_with_metadata = []
-        for idx, chunk in enumerate(text_chunks):
-            chunk_data = {
+        url = property_data.url
+        property_key = f"{_url_key(url)}{position}"
+        self.property_metadata[property_key] = {
+            'title': property_data.title,
+            'location': property_data.location,
+            'price': property_data.price,
+            'property_type': property_data.property_type,
+            'bedrooms': property_data.bedrooms,
+            'area': property_data.area,
+        }
+        
+        total_chunks = len(text_chunks)
+        
+        return [
+            {
+                'id': _chunk_id(url, idx, chunk),
                 'text': chunk,
-                'metadata': {
-                    'property_url': property_data.get('url', ''),
-                    'title': property_data.get('title', ''),
-                    'location': property_data.get('location', ''),
-                    'price': property_data.get('price', ''),
-                    'property_type': property_data.get('property_type', ''),
-                    'bedrooms': property_data.get('bedrooms', ''),
-                    'area': property_data.get('area', ''),
-                    'chunk_index': idx,
-                    'total_chunks': len(text_chunks),
-                }
+                'property_url': url,
+                'property_key': property_key,
+                'chunk_index': idx,
+                'total_chunks': total_chunks,
             }
-            chunks_with_metadata.append(chunk_data)
-        
-        return chunks_with_metadata
+            for idx, chunk in enumerate(text_chunks)
+        ]
     
-    def process_all_properties(self):
-        """Process all properties and create chunks"""
-        print(f"Processing {len(self.raw_data)} properties...")
+    def process_all_properties(self, properties: Iterable[Property] = None):
+        """Process all properties and create chunks
         
+        Args:
+            properties: Optional iterable (e.g. stream_apify) consumed in batches
+                        of PROCESS_BATCH_SIZE; defaults to self.raw_data
+        """
+        if properties is None:
+            properties = self.raw_data
+        total = len(properties) if hasattr(properties, '__len__') else None
+        print(f"Processing {total if total is not None else 'streamed'} properties...")
+        
+        self.property_metadata = {}
+        progress = tqdm(total=total, mininterval=0.5, disable=total is not None and total <= 50)
+        
+        # One create_property_summary call per property; a pandas batch builder measured slower at every size
+        # Serial on purpose: pickling a property to a worker process costs ~3x what chunking it does
         all_chunks = []
-        for property_data in self.raw_data:
-            chunks = self.create_chunks_with_metadata(property_data)
-            all_chunks.extend(chunks)
+        count = 0
+        try:
+            for batch in _batched(properties, PROCESS_BATCH_SIZE):
+                for position, property_data in enumerate(batch, count):
+                    all_chunks.extend(self.create_chunks_with_metadata(property_data, position))
+                
+                count += len(batch)
+                progress.update(len(batch))
+        finally:
+            progress.close()
         
         self.processed_chunks = all_chunks
-        print(f"Created {len(all_chunks)} chunks from {len(self.raw_data)} properties")
+        print(f"Created {len(all_chunks)} chunks from {count} properties")
         return all_chunks
     
+    def iter_batches(self, batch_size: int = 1000):
+        """Yield processed chunks in Pinecone upsert-sized slices"""
+        for i in range(0, len(self.processed_chunks), batch_size):
+            yield self.processed_chunks[i:i + batch_size]
+    
     def save_processed_data(self, filename: str = None):
         """Save processed chunks"""
         if filename is None:
@@ -519,13 +599,48 @@ class DataProcessor:
         filepath = os.path.join(Config.PROCESSED_DATA_DIR, filename)
         os.makedirs(Config.PROCESSED_DATA_DIR, exist_ok=True)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.processed_chunks, f, ensure_ascii=False, indent=2)
+        _dump_json({'properties': self.property_metadata, 'chunks': self.processed_chunks}, filepath)
         
         print(f"Saved {len(self.processed_chunks)} chunks to {filepath}")
         return filepath
 
 
+def _url_key(url: str) -> str:
+    """ID prefix shared by all vectors of one listing, so they can be listed and pruned together"""
+    return hashlib.blake2b(url.encode(), digest_size=8).hexdigest() + "#"
+
+
+def _chunk_id(url: str, chunk_index: int, text: str) -> str:
+    """Content-addressed vector ID: unchanged chunks keep their ID across runs"""
+    # Position is hashed in too, so repeated text never collapses two chunks into one vector
+    return _url_key(url) + hashlib.blake2b(f"{chunk_index}\0{text}".encode(), digest_size=12).hexdigest()
+
+
+def _vector_metadata(text: str, metadata: Dict) -> Dict:
+    """Pinecone metadata for one chunk; empty strings still count toward the upsert payload"""
+    vector_metadata = {'text': text} if text else {}
+    for key in VECTOR_METADATA_FIELDS:
+        value = metadata.get(key)
+        if value:
+            vector_metadata[key] = value
+    # Normalized copies that retrieval can filter on
+    price_lakh = price_in_lakh(metadata.get('price', ''))
+    if price_lakh is not None:
+        vector_metadata['price_lakh'] = price_lakh
+    if metadata.get('location'):
+        vector_metadata['locality'] = locality(metadata['location'])
+    vector_metadata['chunk_index'] = metadata.get('chunk_index', 0)
+    vector_metadata['schema'] = VECTOR_SCHEMA_VERSION
+    return vector_metadata
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield successive lists of up to size items"""
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
 # ============================================================================
 # EMBEDDINGS MANAGER
 # ============================================================================
@@ -543,55 +658,138 @@ class EmbeddingsManager:
         print(f"Using Pinecone Inference embeddings: {Config.EMBEDDING_MODEL}")
         
         print("Connecting to Pinecone...")
-        self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+        self.pc = get_pinecone()
         self.index_name = Config.PINECONE_INDEX_NAME
         self.index = None
+        self._stats = None
         self.chunks_data = []
+        self.property_metadata: Dict[str, Dict] = {}
     
-    def load_processed_chunks(self, filepath: str = None):
-        """Load processed chunks"""
+    def _processed_file(self, filepath: str = None) -> str:
+        """Resolve filepath, defaulting to the newest processed file"""
         if filepath is None:
-            files = [f for f in os.listdir(Config.PROCESSED_DATA_DIR) if f.endswith('.json')]
-            if not files:
+            filepath = _latest_json_file(Config.PROCESSED_DATA_DIR)
+            if filepath is None:
                 raise FileNotFoundError("No JSON files in processed data directory")
-            filepath = os.path.join(Config.PROCESSED_DATA_DIR, sorted(files)[-1])
+        return filepath
+    
+    def load_processed_chunks(self, filepath: str = None):
+        """Load processed chunks"""
+        filepath = self._processed_file(filepath)
         
         print(f"Loading chunks from: {filepath}")
-        with open(filepath, 'r', encoding='utf-8') as f:
-            self.chunks_data = json.load(f)
+        data = _load_json(filepath)
+        
+        # Older files are a bare list of chunks with metadata embedded in each one
+        if isinstance(data, dict):
+            self.property_metadata = data['properties']
+            self.chunks_data = data['chunks']
+        else:
+            self.property_metadata = {}
+            self.chunks_data = data
         
         print(f"Loaded {len(self.chunks_data)} chunks")
         return self.chunks_data
     
-    def generate_embeddings(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
-        """Generate embeddings using Pinecone Inference API"""
+    def iter_processed_chunks(self, filepath: str = None) -> Iterator[Dict]:
+        """Yield processed chunks without loading the whole file
+        
+        Property metadata is read into self.property_metadata before the first
+        chunk is yielded. Without ijson this falls back to load_processed_chunks.
+        """
+        if not IJSON_AVAILABLE:
+            yield from self.load_processed_chunks(filepath)
+            return
+        
+        filepath = self._processed_file(filepath)
+        print(f"Streaming chunks from: {filepath}")
+        with open(filepath, 'rb') as f:
+            # Older files are a bare list of chunks with metadata embedded in each one
+            legacy = f.read(64).lstrip().startswith(b'[')
+            f.seek(0)
+            if legacy:
+                self.property_metadata = {}
+                yield from ijson.items(f, 'item', use_float=True)
+                return
+            
+            self.property_metadata = dict(ijson.kvitems(f, 'properties', use_float=True))
+            f.seek(0)
+            yield from ijson.items(f, 'chunks.item', use_float=True)
+    
+    def chunk_metadata(self, chunk: Dict) -> Dict:
+        """Full metadata for a chunk, joined back from its property record"""
+        if 'metadata' in chunk:
+            return chunk['metadata']
+        # Files written before property_key existed are keyed by URL alone
+        key = chunk.get('property_key', chunk['property_url'])
+        return {
+            **self.property_metadata.get(key, {}),
+            'property_url': chunk['property_url'],
+            'chunk_index': chunk['chunk_index'],
+            'total_chunks': chunk['total_chunks'],
+        }
+    
+    def _embed_batch(self, batch: List[str]) -> np.ndarray:
+        """Embed one batch of passages into a (len(batch), dim) EMBEDDING_DTYPE array"""
+        # Use native Pinecone inference API
+        embeddings = self.pc.inference.embed(
+            model=Config.EMBEDDING_MODEL,
+            inputs=batch,
+            parameters={"input_type": "passage"}
+        )
+        # One packed array instead of a boxed Python float per value
+        return np.asarray([emb.values for emb in embeddings], dtype=EMBEDDING_DTYPE)
+    
+    @staticmethod
+    def _pick_batch_size(texts: List[str]) -> int:
+        """Batch size that keeps a request near EMBED_BATCH_TOKENS, judged from a sample of texts"""
+        if not texts:
+            return EMBED_BATCH_SIZE
+        step = max(1, len(texts) // 100)
+        lengths = sorted(len(text) for text in texts[::step])
+        # ~4 characters per token
+        median_tokens = max(1, lengths[len(lengths) // 2] // 4)
+        return max(EMBED_MIN_BATCH_SIZE, min(EMBED_BATCH_SIZE, EMBED_BATCH_TOKENS // median_tokens))
+    
+    def generate_embeddings(self, texts: List[str], batch_size: int = None,
+                            max_workers: int = 8) -> np.ndarray:
+        """Generate embeddings using Pinecone Inference API
+        
+        Batches are sent from a thread pool so their round trips overlap;
+        results are reassembled in input order. batch_size defaults to
+        _pick_batch_size(texts).
+        """
         print(f"Generating embeddings for {len(texts)} texts using Pinecone Inference...")
         
-        embeddings = []
-        for i in tqdm(range(0, len(texts), batch_size)):
-            batch = texts[i:i + batch_size]
+        if batch_size is None:
+            batch_size = self._pick_batch_size(texts)
+        starts = range(0, len(texts), batch_size)
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._embed_batch, texts[i:i + batch_size]): i for i in starts}
             try:
-                # Use native Pinecone inference API
-                batch_embeddings = self.pc.inference.embed(
-                    model=Config.EMBEDDING_MODEL,
-                    inputs=batch,
-                    parameters={"input_type": "passage"}
-                )
-                embeddings.extend([emb.values for emb in batch_embeddings])
+                for future in tqdm(as_completed(futures), total=len(futures), mininterval=0.5):
+                    results[futures[future]] = future.result()
             except AttributeError as e:
                 print(f"❌ Pinecone inference API not available. Error: {e}")
                 print("Your Pinecone client version might not support inference.")
+                for future in futures:
+                    future.cancel()
                 raise
         
-        return embeddings
+        if not results:
+            return np.empty((0, Config.EMBEDDING_DIMENSION), dtype=EMBEDDING_DTYPE)
+        return np.concatenate([results[i] for i in starts])
     
     def create_or_connect_index(self):
         """Create or connect to Pinecone index"""
         print(f"Checking for index: {self.index_name}")
         
-        existing_indexes = [index.name for index in self.pc.list_indexes()]
-        
-        if self.index_name not in existing_indexes:
+        # Index() resolves the host with describe_index, which doubles as the existence check
+        try:
+            self.index = get_index(self.index_name)
+            print(f"✅ Index exists")
+        except NotFoundException:
             print(f"Creating new index: {self.index_name}")
             self.pc.create_index(
                 name=self.index_name,
@@ -599,105 +797,274 @@ class EmbeddingsManager:
                 metric='cosine',
                 spec=ServerlessSpec(
                     cloud='aws',
-                    region=Config.PINECONE_ENVIRONMENT or 'us-east-1'
-                )
+                    region=Config.PINECONE_ENVIRONMENT
+                ),
+                timeout=-1
             )
+            self._wait_until_ready()
             print(f"✅ Index created")
-            time.sleep(5)
-        else:
-            print(f"✅ Index exists")
+            self.index = get_index(self.index_name)
         
-        self.index = self.pc.Index(self.index_name)
-        stats = self.index.describe_index_stats()
-        print(f"📊 Vectors: {stats.get('total_vector_count', 0)}")
+        # Kept so upload_to_pinecone can report a count without another round trip
+        self._stats = self.index.describe_index_stats()
+        print(f"📊 Vectors: {self._stats.get('total_vector_count', 0)}")
+    
+    def _wait_until_ready(self, timeout: float = INDEX_READY_TIMEOUT):
+        """Poll a new index until it is ready; raise if initialization fails or takes too long"""
+        # Resume as soon as the index reports ready instead of sleeping a fixed time
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.pc.describe_index(self.index_name).status
+            if status['ready']:
+                return
+            if status.get('state') == 'InitializationFailed':
+                raise RuntimeError(f"❌ Pinecone index '{self.index_name}' failed to initialize")
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"❌ Pinecone index '{self.index_name}' not ready after {timeout:.0f}s")
+            time.sleep(0.5)
     
-    def prepare_vectors(self, chunks: List[Dict], embeddings: List[List[float]]) -> List[Dict]:
-        """Prepare vectors for Pinecone"""
-        vectors = []
+    def prepare_vectors(self, chunks: List[Dict], embeddings, start: int = 0) -> List[Dict]:
+        """Prepare vectors for Pinecone; start offsets legacy positional IDs when called per batch
         
-        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            vector = {
-                'id': f"chunk_{idx}_{chunk['metadata'].get('property_url', '').split('/')[-1]}",
+        embeddings may be an EMBEDDING_DTYPE array: its rows are passed through as
+        values, and the Pinecone client converts each to a list only when
+        that vector is serialized.
+        """
+        return [
+            {
+                'id': chunk.get('id') or f"chunk_{idx}_{metadata.get('property_url', '').rsplit('/', 1)[-1]}",
                 'values': embedding,
-                'metadata': {
-                    'text': chunk['text'][:1000],
-                    'full_text': chunk['text'],
-                    'title': chunk['metadata'].get('title', ''),
-                    'location': chunk['metadata'].get('location', ''),
-                    'price': chunk['metadata'].get('price', ''),
-                    'property_type': chunk['metadata'].get('property_type', ''),
-                    'bedrooms': chunk['metadata'].get('bedrooms', ''),
-                    'area': chunk['metadata'].get('area', ''),
-                    'property_url': chunk['metadata'].get('property_url', ''),
-                    'chunk_index': chunk['metadata'].get('chunk_index', 0),
-                }
+                'metadata': _vector_metadata(chunk['text'], metadata),
             }
-            vectors.append(vector)
-        
-        return vectors
+            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings), start)
+            for metadata in [self.chunk_metadata(chunk)]
+        ]
+    
+    def existing_ids(self, ids: List[str]) -> set:
+        """Return the subset of ids already stored with the current metadata schema"""
+        found = set()
+        for i in range(0, len(ids), FETCH_BATCH_SIZE):
+            fetch_result = self.index.fetch(ids=ids[i:i + FETCH_BATCH_SIZE])
+            found.update(
+                vector_id for vector_id, vector in fetch_result.vectors.items()
+                if (vector.metadata or {}).get('schema') == VECTOR_SCHEMA_VERSION
+            )
+        return found
     
     def upload_to_pinecone(self, vectors: List[Dict], batch_size: int = 100):
-        """Upload vectors to Pinecone with deduplication"""
-        import logging
-        logger = logging.getLogger(__name__)
+        """Upload vectors to Pinecone
         
-        logger.info(f"📤 Uploading {len(vectors)} vectors with deduplication...")
+        Upserts are idempotent by ID, and process_and_upload already drops
+        chunks the index holds before embedding them, so no dedup probe here.
+        """
+        if not vectors:
+            logger.info("ℹ️  No new vectors to upload")
+            return
         
-        # Check existing IDs to avoid duplicates
-        existing_ids = set()
+        logger.info(f"📤 Uploading {len(vectors)} vectors...")
+        batches = (vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size))
+        total_batches = -(-len(vectors) // batch_size)
+        self._upsert_stream(tqdm(batches, total=total_batches, mininterval=0.5))
+    
+    def _upsert_stream(self, vector_batches: Iterable[List[Dict]]) -> int:
+        """Upsert batches as they arrive and return how many vectors were sent"""
+        # Keep up to UPSERT_CONCURRENCY requests in flight, oldest awaited first;
+        # failed batches are retried in the background so the rest keep flowing
+        pending = deque()
+        retries = []
+        count = 0
+        with ThreadPoolExecutor(max_workers=4) as retry_executor:
+            for batch in vector_batches:
+                if len(pending) >= UPSERT_CONCURRENCY:
+                    self._finish_upsert(*pending.popleft(), retry_executor, retries)
+                pending.append((batch, self.index.upsert(vectors=batch, async_req=True)))
+                count += len(batch)
+            
+            while pending:
+                self._finish_upsert(*pending.popleft(), retry_executor, retries)
+            
+            for future in retries:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to upload batch after {UPSERT_ATTEMPTS} attempts: {e}")
+                    raise
+        
+        logger.info("✅ Upload completed")
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            time.sleep(2)
+            stats = self.index.describe_index_stats()
+            logger.debug(f"📊 Total vectors in index: {stats.get('total_vector_count', 0)}")
+        elif self._stats is not None:
+            estimate = self._stats.get('total_vector_count', 0) + count
+            logger.info(f"📊 Total vectors in index: ~{estimate}")
+        
+        return count
+    
+    def _finish_upsert(self, batch: List[Dict], result, retry_executor, retries: List):
+        """Wait for an async upsert, queueing the batch for retry if it failed"""
         try:
-            # Fetch sample to check if IDs exist
-            for vector in vectors[:min(10, len(vectors))]:
-                fetch_result = self.index.fetch(ids=[vector['id']])
-                if fetch_result.vectors:
-                    existing_ids.add(vector['id'])
+            # gRPC returns a future, REST returns a multiprocessing ApplyResult
+            return result.result() if hasattr(result, 'result') else result.get()
         except Exception as e:
-            logger.warning(f"Could not check existing vectors: {e}")
-        
-        # Filter out duplicates
-        new_vectors = [v for v in vectors if v['id'] not in existing_ids]
-        duplicate_count = len(vectors) - len(new_vectors)
+            logger.warning(f"Batch upload failed, retrying in background: {e}")
+            retries.append(retry_executor.submit(self._upsert_one, batch))
+    
+    @retry(wait=wait_random_exponential(multiplier=0.5, max=8),
+           stop=stop_after_attempt(UPSERT_ATTEMPTS), reraise=True)
+    def _upsert_one(self, batch: List[Dict]):
+        """Upsert one batch synchronously"""
+        return self.index.upsert(vectors=batch)
+    
+    def _unindexed_chunks(self, chunks: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield only chunks the index doesn't hold with current metadata, so the rest are never re-embedded"""
+        skipped = 0
+        for window in _batched(chunks, FETCH_BATCH_SIZE):
+            ids = [chunk['id'] for chunk in window if 'id' in chunk]
+            existing = set()
+            try:
+                if ids:
+                    existing = self.existing_ids(ids)
+            except Exception as e:
+                logger.warning(f"Could not check existing vectors: {e}")
+            skipped += sum(chunk.get('id') in existing for chunk in window)
+            yield from (chunk for chunk in window if chunk.get('id') not in existing)
         
-        if duplicate_count > 0:
-            logger.info(f"⚠️  Skipping {duplicate_count} duplicate vectors")
+        if skipped:
+            print(f"⏭️  Skipping {skipped} chunks already in the index")
+    
+    def process_and_upload(self, max_workers: int = 8, force: bool = False) -> int:
+        """Complete pipeline
         
-        if not new_vectors:
-            logger.info("ℹ️  All vectors already exist in index")
-            return
+        Parsing, embedding and upserting run as one stream: a background
+        thread parses chunks into batches, the embedding pool works through
+        them, and each embedded batch is upserted as soon as it is ready, so
+        only in-flight batches are held in memory. Chunks already indexed
+        with the current metadata schema are skipped unless force is set.
+        Once everything is uploaded, vectors the listings no longer produce
+        are deleted. Returns the number of vectors uploaded.
+        """
+        batches = queue.Queue(maxsize=EMBED_QUEUE_SIZE)
+        # Set when the consumer side stops early, so the producer never blocks on a full queue
+        stop = threading.Event()
+        current_ids = set()
+        current_urls = set()
         
-        logger.info(f"📤 Uploading {len(new_vectors)} new vectors...")
+        def record_ids(chunks):
+            for chunk in chunks:
+                current_ids.add(chunk.get('id'))
+                current_urls.add(chunk.get('property_url', ''))
+                yield chunk
         
-        # Upload with retry logic
-        max_retries = 3
-        for i in tqdm(range(0, len(new_vectors), batch_size)):
-            batch = new_vectors[i:i + batch_size]
-            
-            for retry in range(max_retries):
+        def put(item) -> bool:
+            while not stop.is_set():
                 try:
-                    self.index.upsert(vectors=batch)
-                    break
-                except Exception as e:
-                    if retry == max_retries - 1:
-                        logger.error(f"Failed to upload batch after {max_retries} retries: {e}")
-                        raise
-                    logger.warning(f"Retry {retry + 1}/{max_retries} for batch upload")
-                    time.sleep(2 ** retry)
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
         
-        logger.info("✅ Upload completed")
-        time.sleep(2)
+        def produce():
+            try:
+                chunks = record_ids(self.iter_processed_chunks())
+                if not force:
+                    chunks = self._unindexed_chunks(chunks)
+                # Size batches from the first chunks, then stream the rest
+                head = list(islice(chunks, 100))
+                batch_size = self._pick_batch_size([chunk['text'] for chunk in head])
+                for batch in _batched(chain(head, chunks), batch_size):
+                    if not put(batch):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(None)
         
-        stats = self.index.describe_index_stats()
-        logger.info(f"📊 Total vectors in index: {stats.get('total_vector_count', 0)}")
-    
-    def process_and_upload(self):
-        """Complete pipeline"""
-        self.load_processed_chunks()
-        texts = [chunk['text'] for chunk in self.chunks_data]
-        embeddings = self.generate_embeddings(texts)
+        def consume():
+            while (item := batches.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        
+        def embedded():
+            # Yield vector batches in order; up to 2 * max_workers embed calls stay in flight
+            in_flight = deque()
+            offset = 0
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for batch in consume():
+                    future = executor.submit(self._embed_batch, [c['text'] for c in batch])
+                    in_flight.append((batch, offset, future))
+                    offset += len(batch)
+                    while in_flight and (in_flight[0][2].done() or len(in_flight) > 2 * max_workers):
+                        batch, start, future = in_flight.popleft()
+                        yield self.prepare_vectors(batch, future.result(), start)
+                
+                while in_flight:
+                    batch, start, future = in_flight.popleft()
+                    yield self.prepare_vectors(batch, future.result(), start)
+        
+        # The index is needed up front to skip chunks it already holds
         self.create_or_connect_index()
-        vectors = self.prepare_vectors(self.chunks_data, embeddings)
-        self.upload_to_pinecone(vectors)
-        return vectors
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        print("Embedding and uploading chunks using Pinecone Inference...")
+        try:
+            count = self._upsert_stream(tqdm(embedded(), mininterval=0.5))
+        finally:
+            stop.set()
+            producer.join()
+        print(f"Embedded and uploaded {count} chunks")
+        self.prune_superseded(current_ids, current_urls)
+        return count
+    
+    def prune_superseded(self, current_ids: set, current_urls: set) -> int:
+        """Delete vectors of the processed listings that are not in current_ids
+        
+        A listing whose text changed gets new chunk IDs; without this its old
+        chunks (and outdated prices) would stay searchable. Legacy chunk_* IDs
+        are removed only for listings in current_urls. Listings missing from
+        this run are not touched. Needs a serverless index for list().
+        """
+        if not current_ids:
+            return 0
+        
+        prefixes = {vector_id[:vector_id.index('#') + 1] for vector_id in current_ids if vector_id and '#' in vector_id}
+        legacy_slugs = set()
+        if None not in current_ids:
+            # Chunks from legacy files have no stored ID and are uploaded under legacy IDs, so keep those
+            legacy_slugs = {url.rsplit('/', 1)[-1] for url in current_urls} - {''}
+        if legacy_slugs:
+            prefixes.add(LEGACY_ID_PREFIX)
+        
+        def is_stale(vector_id: str) -> bool:
+            if vector_id in current_ids:
+                return False
+            if vector_id.startswith(LEGACY_ID_PREFIX):
+                # chunk_<n>_<slug>: the slug is the last path segment of the listing URL
+                return vector_id.split('_', 2)[-1] in legacy_slugs
+            return True
+        
+        def prune(prefix):
+            stale = [vector_id for page in self.index.list(prefix=prefix)
+                     for vector_id in page if is_stale(vector_id)]
+            for i in range(0, len(stale), DELETE_BATCH_SIZE):
+                self.index.delete(ids=stale[i:i + DELETE_BATCH_SIZE])
+            return len(stale)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=UPSERT_CONCURRENCY) as executor:
+                deleted = sum(executor.map(prune, prefixes))
+        except Exception as e:
+            logger.warning(f"Could not prune superseded vectors: {e}")
+            return 0
+        
+        if deleted:
+            print(f"🧹 Deleted {deleted} superseded vectors")
+        return deleted
 
 
 # ============================================================================
@@ -712,7 +1079,6 @@ def run_complete_pipeline(preferences: Dict = None):
                     {'city': 'Mumbai', 'bhk': '3', 'property_type': 'apartment', 
                      'min_price': 50, 'max_price': 300}
     """
-    import logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logger = logging.getLogger(__name__)
     
@@ -733,7 +1099,7 @@ def run_complete_pipeline(preferences: Dict = None):
     if not scraper.use_apify:
         raise RuntimeError("❌ Production mode requires Apify. Set APIFY_API_TOKEN in .env")
     
-    # Try Apify first, fallback to sample data if trial expired
+    # Try Apify first, then fetch the pages directly, then fall back to sample data
     logger.info("📋 Attempting to scrape real properties via Apify...")
     
     # These are real Bangalore property URLs for Apify
@@ -755,12 +1121,23 @@ def run_complete_pipeline(preferences: Dict = None):
         
     except Exception as e:
         logger.warning(f"⚠️  Apify scraping failed: {e}")
+        properties = []
+    
+    if not properties:
+        # Fetch the pages directly before settling for sample data
+        logger.info("🌐 Fetching property pages directly...")
+        try:
+            properties = asyncio.run(scraper.scrape_urls_async(bangalore_urls))
+        except Exception as e:
+            logger.warning(f"⚠️  Direct scraping failed: {e}")
+    
+    if not properties:
         logger.info("📦 Using sample data fallback for demo...")
         properties = scraper.get_sample_properties()
         logger.info(f"✅ Using {len(properties)} sample Bangalore properties")
     
     if not properties:
-        raise RuntimeError("❌ No properties available (Apify failed and no sample data).")
+        raise RuntimeError("❌ No properties available (scraping failed and no sample data).")
     
     logger.info(f"✅ Total properties scraped: {len(properties)}")
     scraper.properties = properties
@@ -782,7 +1159,7 @@ def run_complete_pipeline(preferences: Dict = None):
     
     try:
         manager = EmbeddingsManager()
-        manager.process_and_upload()
+        manager.process_and_upload(force=Config.REINDEX)
         
         print("\n" + "=" * 60)
         print("✅ Pipeline completed successfully!")
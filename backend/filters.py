@@ -0,0 +1,65 @@
+"""
+Structured search filters
+Prices and localities are normalized the same way when vectors are upserted
+and when queries are parsed, so Pinecone can filter on them before ranking
+"""
+
+import json
+import re
+from typing import Dict, Optional
+
+# Localities the chatbot covers; matched as whole words in the query
+KNOWN_LOCALITIES = (
+    'whitefield', 'electronic city', 'sarjapur road', 'indiranagar', 'koramangala',
+    'hsr layout', 'jp nagar', 'marathahalli', 'bommanahalli', 'btm layout',
+    'bellandur', 'hebbal', 'yelahanka', 'hennur road', 'bannerghatta road',
+)
+
+LAKH_PER_UNIT = {'lakh': 1, 'lakhs': 1, 'lac': 1, 'l': 1, 'cr': 100, 'crore': 100, 'crores': 100}
+
+_PRICE_RE = re.compile(r'([\d.]+)\s*(crores?|cr|lakhs?|lac|l)\b', re.IGNORECASE)
+_MAX_PRICE_RE = re.compile(
+    r'\b(?:under|below|less than|within|upto|up to)\s*(?:rs\.?|₹)?\s*([\d.]+)\s*(crores?|cr|lakhs?|lac|l)\b',
+    re.IGNORECASE,
+)
+_LOCALITY_RE = re.compile(r'\b(' + '|'.join(re.escape(name) for name in KNOWN_LOCALITIES) + r')\b')
+
+
+def _to_lakh(amount: str, unit: str) -> Optional[float]:
+    try:
+        return float(amount) * LAKH_PER_UNIT[unit.lower()]
+    except ValueError:
+        return None
+
+
+def price_in_lakh(price: str) -> Optional[float]:
+    """Listing price such as '₹ 1.2 Cr' or '₹ 75 Lakh' in lakh; None if it can't be read"""
+    match = _PRICE_RE.search(price or '')
+    return _to_lakh(*match.groups()) if match else None
+
+
+def locality(location: str) -> str:
+    """Normalized locality from a location like 'Whitefield, Bangalore'"""
+    return (location or '').split(',')[0].strip().lower()
+
+
+def query_filter(query: str) -> Optional[Dict]:
+    """Pinecone metadata filter for the price cap and localities named in a query"""
+    conditions: Dict[str, Dict] = {}
+
+    match = _MAX_PRICE_RE.search(query)
+    if match:
+        max_price = _to_lakh(*match.groups())
+        if max_price is not None:
+            conditions['price_lakh'] = {'$lte': max_price}
+
+    localities = sorted(set(_LOCALITY_RE.findall(query.lower())))
+    if localities:
+        conditions['locality'] = {'$in': localities}
+
+    return conditions or None
+
+
+def filter_key(search_filter: Optional[Dict]) -> str:
+    """Canonical string for a filter, so equal filters compare and hash equal"""
+    return json.dumps(search_filter, sort_keys=True) if search_filter else ''
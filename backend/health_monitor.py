@@ -1,11 +1,20 @@
 """Production-grade health monitoring and metrics"""
 
+import statistics
+import threading
 import time
+from collections import deque
 from typing import Dict, Optional
 from datetime import datetime
-from pinecone import Pinecone
-from groq import Groq
 from config import Config
+from clients import get_groq, get_index
+
+# Seconds a component check result is reused before probing again
+HEALTH_CACHE_TTL = 30
+
+# Recent successful response times kept for latency percentiles
+LATENCY_WINDOW = 1000
+
 
 class HealthMonitor:
     """Monitor system health and collect metrics"""
@@ -15,6 +24,9 @@ class HealthMonitor:
         self.query_count = 0
         self.error_count = 0
         self.total_response_time = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._cache: Dict[str, tuple] = {}
         
     def check_all(self) -> Dict:
         """
@@ -32,11 +44,11 @@ class HealthMonitor:
         }
         
         # Check Pinecone
-        pinecone_health = self._check_pinecone()
+        pinecone_health = self._cached('pinecone', self._check_pinecone)
         health['components']['pinecone'] = pinecone_health
         
         # Check Groq
-        groq_health = self._check_groq()
+        groq_health = self._cached('groq', self._check_groq)
         health['components']['groq'] = groq_health
         
         # Determine overall status
@@ -47,11 +59,20 @@ class HealthMonitor:
         
         return health
     
+    def _cached(self, component: str, check) -> Dict:
+        """Return the last result for component, re-running check once it expires"""
+        cached = self._cache.get(component)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+        
+        result = check()
+        self._cache[component] = (result, time.monotonic() + HEALTH_CACHE_TTL)
+        return result
+    
     def _check_pinecone(self) -> Dict:
         """Check Pinecone health"""
         try:
-            pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-            index = pc.Index(Config.PINECONE_INDEX_NAME)
+            index = get_index(Config.PINECONE_INDEX_NAME)
             
             start = time.time()
             stats = index.describe_index_stats()
@@ -83,14 +104,11 @@ class HealthMonitor:
     def _check_groq(self) -> Dict:
         """Check Groq LLM health"""
         try:
-            client = Groq(api_key=Config.GROQ_API_KEY)
+            client = get_groq()
             
+            # Listing models checks auth and reachability without spending tokens
             start = time.time()
-            completion = client.chat.completions.create(
-                messages=[{"role": "user", "content": "ping"}],
-                model=Config.GROQ_MODEL,
-                max_tokens=5
-            )
+            client.models.list()
             latency = time.time() - start
             
             result = {
@@ -112,29 +130,45 @@ class HealthMonitor:
     
     def record_query(self, response_time: float, success: bool):
         """Record query metrics"""
-        self.query_count += 1
-        if success:
-            self.total_response_time += response_time
-        else:
-            self.error_count += 1
+        with self._lock:
+            self.query_count += 1
+            if success:
+                self.total_response_time += response_time
+                self._latencies.append(response_time)
+            else:
+                self.error_count += 1
     
     def get_metrics(self) -> Dict:
         """Get application metrics"""
+        with self._lock:
+            query_count = self.query_count
+            error_count = self.error_count
+            total_response_time = self.total_response_time
+            latencies = list(self._latencies)
+        
         avg_response_time = (
-            self.total_response_time / self.query_count 
-            if self.query_count > 0 else 0
+            total_response_time / query_count 
+            if query_count > 0 else 0
         )
         
         error_rate = (
-            self.error_count / self.query_count 
-            if self.query_count > 0 else 0
+            error_count / query_count 
+            if query_count > 0 else 0
         )
         
+        if len(latencies) > 1:
+            percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+            p50, p95 = percentiles[49], percentiles[94]
+        else:
+            p50 = p95 = latencies[0] if latencies else 0
+        
         return {
-            'total_queries': self.query_count,
-            'total_errors': self.error_count,
+            'total_queries': query_count,
+            'total_errors': error_count,
             'error_rate': f"{error_rate * 100:.1f}%",
-            'avg_response_time': f"{avg_response_time:.2f}s"
+            'avg_response_time': f"{avg_response_time:.2f}s",
+            'p50_response_time': f"{p50:.2f}s",
+            'p95_response_time': f"{p95:.2f}s"
         }
 
 
@@ -4,31 +4,62 @@ FastAPI Backend for Magicbricks RAG Chatbot (Production-Ready)
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Optional
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import time
 import logging
 from pathlib import Path
 
-from rag_chatbot import RAGPipeline
+from rag_chatbot import get_pipeline
 from config import Config
 from health_monitor import monitor
 
-# Setup logging
+# orjson support (optional, faster response serialization)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+ResponseClass = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+# Setup logging (force replaces the CLI default rag_chatbot installs on import)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    force=True
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the RAG pipeline before the first request; /query retries if this fails"""
+    app.state.rag = None
+    app.state.rag_error = None
+    try:
+        logger.info("Initializing RAG pipeline...")
+        app.state.rag = get_pipeline()
+        logger.info("✅ RAG pipeline ready")
+    except Exception as e:
+        # Keep serving so /health and /stats can report the failure
+        logger.error(f"Failed to initialize RAG pipeline: {e}")
+        app.state.rag_error = str(e)
+    yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Magicbricks RAG Chatbot API",
     description="Production-grade property search with RAG",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ResponseClass
 )
 
 # CORS middleware for production
@@ -45,38 +76,11 @@ static_path = Path(__file__).parent / "static"
 static_path.mkdir(exist_ok=True)
 app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
 
-# Initialize RAG pipeline (lazy loading)
-rag_pipeline: Optional[RAGPipeline] = None
-
-
-def get_rag_pipeline():
-    """Lazy load RAG pipeline with error handling"""
-    global rag_pipeline
-    if rag_pipeline is None:
-        try:
-            logger.info("Initializing RAG pipeline...")
-            rag_pipeline = RAGPipeline()
-            logger.info("✅ RAG pipeline ready")
-        except Exception as e:
-            logger.error(f"Failed to initialize RAG pipeline: {e}")
-            raise HTTPException(
-                status_code=500, 
-                detail=f"System initialization failed: {str(e)}"
-            )
-    return rag_pipeline
-
-
 # Request/Response models with validation
 class QueryRequest(BaseModel):
-    query: str = Field(..., min_length=3, max_length=500)
+    # Stripped before the length check, so whitespace-only queries are rejected in pydantic-core
+    query: Annotated[str, StringConstraints(strip_whitespace=True, min_length=3, max_length=500)]
     top_k: Optional[int] = Field(default=5, ge=1, le=20)
-    
-    @field_validator('query')
-    @classmethod
-    def query_not_empty(cls, v):
-        if not v.strip():
-            raise ValueError('Query cannot be empty or just whitespace')
-        return v.strip()
 
 
 class QueryResponse(BaseModel):
@@ -108,7 +112,7 @@ async def root():
 async def health_check():
     """Comprehensive health check with component status"""
     try:
-        health_data = monitor.check_all()
+        health_data = await asyncio.to_thread(monitor.check_all)
         
         status_code = 200
         if health_data['overall_status'] == 'unhealthy':
@@ -116,13 +120,13 @@ async def health_check():
         elif health_data['overall_status'] == 'degraded':
             status_code = 200  # Still serving but with warnings
         
-        return JSONResponse(
+        return ResponseClass(
             status_code=status_code,
             content=health_data
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        return ResponseClass(
             status_code=503,
             content={
                 "status": "unhealthy",
@@ -132,7 +136,7 @@ async def health_check():
 
 
 @app.post("/query", response_model=QueryResponse)
-async def query_properties(request: QueryRequest):
+async def query_properties(request: QueryRequest, http_request: Request):
     """
     Process user query and return response with sources (production-ready)
     """
@@ -144,10 +148,23 @@ async def query_properties(request: QueryRequest):
         logger.info(f"📥 Query received: '{request.query}'")
         
         # Get RAG pipeline
-        rag = get_rag_pipeline()
+        rag = http_request.app.state.rag
+        if rag is None:
+            # Startup failed; try again so a transient Pinecone/Groq outage doesn't need a restart
+            try:
+                rag = await asyncio.to_thread(get_pipeline)
+            except Exception as e:
+                http_request.app.state.rag_error = str(e)
+                raise HTTPException(
+                    status_code=500, 
+                    detail=f"System initialization failed: {e}"
+                )
+            http_request.app.state.rag = rag
+            http_request.app.state.rag_error = None
+            logger.info("✅ RAG pipeline ready")
         
-        # Process query with monitoring
-        result = rag.query(request.query, top_k=request.top_k, return_chunks=True)
+        # Process query with monitoring; aquery keeps blocking Pinecone calls off the event loop
+        result = await rag.aquery(request.query, top_k=request.top_k, return_chunks=True)
         
         # Format sources
         sources = []
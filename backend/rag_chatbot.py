@@ -3,24 +3,250 @@ RAG Chatbot for Magicbricks Property Search
 Combines RAG pipeline and CLI interface
 """
 
-from typing import List, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from cachetools import TTLCache
+import numpy as np
 from pinecone import Pinecone
-from groq import Groq
 from config import Config
+from groq.types.chat import ChatCompletionMessageParam
+from clients import get_async_groq, get_groq, get_index, get_pinecone
+from filters import filter_key, query_filter
+import asyncio
+import copy
+import hashlib
+import logging
+import random
+import re
 import sys
+import threading
+import time
+
+# diskcache support (optional, persists LLM answers across restarts)
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Seconds a describe_index_stats result is reused before asking Pinecone again
+INDEX_STATS_TTL = 60
 
 
 # ============================================================================
 # RAG PIPELINE
 # ============================================================================
 
+class QueryEmbedBatcher:
+    """Coalesce concurrent query embeddings into one Inference API call
+    
+    A query arriving while nothing else is embedding is sent straight away.
+    Queries arriving while a call is in flight join an open batch, which is
+    sent once it holds max_batch_size queries or max_wait_ms has passed.
+    """
+    
+    def __init__(self, pc: Pinecone, max_batch_size: int = Config.QUERY_EMBED_BATCH_SIZE,
+                 max_wait_ms: int = Config.QUERY_EMBED_WAIT_MS) -> None:
+        self.pc = pc
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._open: Optional[Tuple[List[Tuple[str, Future]], threading.Event]] = None
+        self._in_flight = 0
+    
+    def embed(self, query: str) -> List[float]:
+        """Embed one query, sharing the request with any concurrent callers"""
+        future: Future = Future()
+        with self._lock:
+            batch = self._open
+            if batch is None and self._in_flight == 0:
+                items, full = [(query, future)], None
+                self._in_flight += 1
+            elif batch is None:
+                items, full = [(query, future)], threading.Event()
+                self._open = (items, full)
+            else:
+                batch[0].append((query, future))
+                if len(batch[0]) >= self.max_batch_size:
+                    self._open = None
+                    batch[1].set()
+                items = None
+        
+        if items is None:
+            return future.result()
+        
+        if full is not None:
+            # This caller opened the batch, so it waits out the window and sends it
+            full.wait(self.max_wait)
+            with self._lock:
+                if self._open is not None and self._open[0] is items:
+                    self._open = None
+                self._in_flight += 1
+        
+        self._flush(items)
+        return future.result()
+    
+    def _flush(self, items: List[Tuple[str, Future]]) -> None:
+        """Embed a closed batch and hand each caller its vector"""
+        try:
+            # Use native Pinecone inference API
+            embeddings = self.pc.inference.embed(
+                model=Config.EMBEDDING_MODEL,
+                inputs=[query for query, _ in items],
+                parameters={"input_type": "query"}
+            )
+            for (_, future), embedding in zip(items, embeddings):
+                future.set_result(embedding.values)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+
+# Prompts for answer generation; only the user prompt varies between calls
+SYSTEM_PROMPT = """You are a real estate assistant. Answer ONLY using the properties provided in the context below. DO NOT make up information.
+
+CRITICAL RULES:
+1. If context has matching properties → List them with details
+2. If context has NO matching properties → Say "No properties found with those criteria" and show what IS available
+3. ALWAYS use actual prices, locations, and amenities from the context
+4. Format each property as ONE bullet point:
+   • **[Type]** in [Location] - ₹[Price] | [BHK] | [Area] | [Amenities] [SOURCE:N]"""
+
+USER_PROMPT_TEMPLATE = """Available Properties in Database:
+{context}
+
+User Query: {query}
+
+INSTRUCTIONS:
+1. Check if any properties match the user's query
+2. List matching properties with ALL details (price, location, BHK, amenities)
+3. Add [SOURCE:N] at the end of each property line
+4. If NO match found, say so clearly and show what properties ARE available
+
+Answer:"""
+
+# Query canonicalization for cache keys: spelling variants of the same search share an entry
+_QUERY_PUNCT_RE = re.compile(r'[^\w\s₹.]|(?<!\d)\.|\.(?!\d)')
+_QUERY_REWRITES = (
+    (re.compile(r'(\d+)\s*bhk\b'), r'\1bhk'),
+    # Detach units from their numbers first ('2crore' -> '2 crore') so the spellings below apply
+    (re.compile(r'(\d)\s*(crores?|cr|lakhs?|lacs?|l|sq\s*ft|sqft|square\s*feet|sq\s*feet)\b'), r'\1 \2'),
+    (re.compile(r'\b(?:crores?|cr)\b'), 'cr'),
+    (re.compile(r'\b(?:lakhs?|lacs?)\b'), 'lakh'),
+    (re.compile(r'(\d) l\b'), r'\1 lakh'),
+    (re.compile(r'\b(?:sq\s*ft|sqft|square\s*feet|sq\s*feet)\b'), 'sqft'),
+    (re.compile(r'₹\s*'), '₹ '),
+)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and unify units; word order is kept since it can carry meaning"""
+    query = _QUERY_PUNCT_RE.sub(' ', query.lower())
+    for pattern, replacement in _QUERY_REWRITES:
+        query = pattern.sub(replacement, query)
+    return " ".join(query.split())
+
+
+# Full-jitter retry backoff: a random wait of up to base * 2**retry seconds, capped
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 1.0
+
+
+def _retry_delay(retry: int) -> float:
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** retry))
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a retry could help: timeouts, rate limits, 5xx and errors without a status code"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'status', None)
+    return not isinstance(status, int) or status >= 500 or status in (408, 429)
+
+
+# Rough characters per token for English text, used to budget the prompt context
+CHARS_PER_TOKEN = 4
+
+# int8 scale for semantic cache vectors; components of a unit vector lie in [-1, 1]
+QUANT_SCALE = 127
+
+
+class SemanticCache:
+    """Reuse results for queries whose embeddings are nearly identical
+    
+    Embeddings are L2-normalized and quantized to int8 in a preallocated
+    matrix (a quarter of the float32 footprint), so a lookup is one integer
+    matrix-vector product. Only entries stored with the same scope (top_k and
+    Pinecone filter) can match; the least recently used entry is replaced
+    when full. Scopes are masked by hash and then compared exactly.
+    """
+    
+    def __init__(self, dim: int, maxsize: int, threshold: float) -> None:
+        self.threshold = threshold
+        self._vectors = np.zeros((maxsize, dim), dtype=np.int8)
+        self._scope_hashes = np.zeros(maxsize, dtype=np.int64)
+        self._scopes: List[Optional[Tuple[int, str]]] = [None] * maxsize
+        self._last_used = np.zeros(maxsize, dtype=np.int64)
+        self._entries: List[Optional[Dict]] = [None] * maxsize
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    @classmethod
+    def _quantize(cls, embedding: List[float]) -> np.ndarray:
+        return np.round(cls._normalize(embedding) * QUANT_SCALE).astype(np.int8)
+    
+    def get(self, embedding: List[float], scope: Tuple[int, str]) -> Optional[Dict]:
+        """Cached result for the most similar query, if it clears the threshold"""
+        query = self._quantize(embedding)
+        with self._lock:
+            if not self._size:
+                return None
+            # Accumulate in int32: 1024 products of up to 127*127 overflow int16
+            dots = np.einsum('ij,j->i', self._vectors[:self._size], query, dtype=np.int32)
+            similarities = dots / (QUANT_SCALE * QUANT_SCALE)
+            similarities[self._scope_hashes[:self._size] != hash(scope)] = -1.0
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold or self._scopes[best] != scope:
+                return None
+            self._clock += 1
+            self._last_used[best] = self._clock
+            return self._entries[best]
+    
+    def put(self, embedding: List[float], scope: Tuple[int, str], entry: Dict) -> None:
+        """Store entry under embedding, evicting the least recently used slot when full"""
+        vector = self._quantize(embedding)
+        with self._lock:
+            if self._size < len(self._entries):
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(self._last_used.argmin())
+            self._clock += 1
+            self._vectors[slot] = vector
+            self._scope_hashes[slot] = hash(scope)
+            self._scopes[slot] = scope
+            self._last_used[slot] = self._clock
+            self._entries[slot] = entry
+
+
 class RAGPipeline:
     """RAG pipeline for property search and question answering"""
     
-    def __init__(self):
-        import logging
-        self.logger = logging.getLogger(__name__)
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    def __init__(self) -> None:
+        self.logger = logger
         
         try:
             Config.validate()
@@ -31,21 +257,32 @@ class RAGPipeline:
         
         try:
             self.logger.info("Connecting to Pinecone...")
-            self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
-            self.index = self.pc.Index(Config.PINECONE_INDEX_NAME)
-            
-            # Verify index exists and get stats
-            stats = self.index.describe_index_stats()
-            vector_count = stats.get('total_vector_count', 0)
-            self.logger.info(f"✅ Connected to Pinecone index '{Config.PINECONE_INDEX_NAME}' ({vector_count} vectors)")
-            
-            if vector_count == 0:
-                self.logger.warning("⚠️  Index is empty. Run data_pipeline.py to populate it.")
+            self.pc = get_pinecone()
+            self.index = get_index(Config.PINECONE_INDEX_NAME)
+            self.embed_batcher = QueryEmbedBatcher(self.pc)
+            # Index stats are fetched on first use (see _index_stats), not at startup
+            self._stats: Any = None
+            self._stats_expiry = 0.0
+            self._stats_lock = threading.Lock()
+            self.logger.info(f"✅ Connected to Pinecone index '{Config.PINECONE_INDEX_NAME}'")
             
             self.logger.info(f"Using embedding model: {Config.EMBEDDING_MODEL}")
             
             self.logger.info("Initializing Groq LLM client...")
-            self.groq_client = Groq(api_key=Config.GROQ_API_KEY)
+            self.groq_client = get_groq()
+            
+            # Full results for recent queries, keyed by normalized query text and top_k
+            self._response_cache = TTLCache(maxsize=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
+            self._cache_lock = threading.Lock()
+            self._disk_cache = None
+            if DISKCACHE_AVAILABLE:
+                self._disk_cache = diskcache.Cache(Config.RESPONSE_CACHE_DIR, size_limit=Config.DISK_CACHE_SIZE_LIMIT)
+            self._semantic_cache = SemanticCache(
+                Config.EMBEDDING_DIMENSION, Config.SEMANTIC_CACHE_SIZE, Config.SEMANTIC_CACHE_THRESHOLD
+            )
+            
+            if Config.WARMUP_ON_START:
+                self._warmup()
             
             self.logger.info("✅ RAG Pipeline initialized successfully")
             
@@ -53,43 +290,71 @@ class RAGPipeline:
             self.logger.error(f"Failed to initialize RAG Pipeline: {e}")
             raise
     
-    def retrieve_relevant_chunks(self, query: str, top_k: int = None) -> List[Dict]:
+    def _warmup(self) -> None:
+        """Open the embedding, index and LLM connections so the first query doesn't pay for TLS setup"""
+        def generate() -> None:
+            self.groq_client.chat.completions.create(
+                messages=[{"role": "user", "content": "hi"}],
+                model=Config.GROQ_MODEL,
+                max_tokens=1
+            )
+        
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(self.embed_batcher.embed, "warmup"),
+                       executor.submit(self._index_stats),
+                       executor.submit(generate)]
+        for future in futures:
+            if future.exception() is not None:
+                # Warmup is best effort; the real query will surface any lasting problem
+                self.logger.warning(f"Warmup call failed: {future.exception()}")
+        self.logger.info(f"🔥 Warmup finished in {time.time() - start:.2f}s")
+    
+    def retrieve_relevant_chunks(self, query: str, top_k: Optional[int] = None,
+                                 query_embedding: Optional[List[float]] = None) -> List[Dict]:
         """Retrieve relevant property chunks from Pinecone"""
         if top_k is None:
             top_k = Config.TOP_K_RESULTS
         
         try:
-            # Use native Pinecone inference API
-            query_embeddings = self.pc.inference.embed(
-                model=Config.EMBEDDING_MODEL,
-                inputs=[query],
-                parameters={"input_type": "query"}
-            )
-            query_embedding = query_embeddings[0].values
+            if query_embedding is None:
+                query_embedding = self.embed_batcher.embed(query)
             
+            # Price caps and localities in the query are applied by Pinecone before ranking
+            search_filter = query_filter(query)
             results = self.index.query(
                 vector=query_embedding,
                 top_k=top_k,
-                include_metadata=True
+                include_metadata=True,
+                filter=search_filter
             )
+            if search_filter and not results['matches']:
+                # Nothing passes the filter (or the index predates price_lakh/locality);
+                # search unfiltered so the LLM can say what IS available
+                results = self.index.query(
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True
+                )
         except Exception as e:
             print(f"❌ Error in retrieve_relevant_chunks: {e}")
             raise
         
         relevant_chunks = []
         for match in results['matches']:
-            chunk = {
-                'text': match['metadata'].get('full_text', match['metadata'].get('text', '')),
+            # Empty fields are not stored in Pinecone, so every field needs a default
+            get = match['metadata'].get
+            relevant_chunks.append({
+                'text': get('full_text') or get('text', ''),
                 'score': match['score'],
-                'title': match['metadata'].get('title', ''),
-                'location': match['metadata'].get('location', ''),
-                'price': match['metadata'].get('price', ''),
-                'property_type': match['metadata'].get('property_type', ''),
-                'bedrooms': match['metadata'].get('bedrooms', ''),
-                'area': match['metadata'].get('area', ''),
-                'url': match['metadata'].get('property_url', ''),
-            }
-            relevant_chunks.append(chunk)
+                'title': get('title', ''),
+                'location': get('location', ''),
+                'price': get('price', ''),
+                'property_type': get('property_type', ''),
+                'bedrooms': get('bedrooms', ''),
+                'area': get('area', ''),
+                'url': get('property_url', ''),
+            })
         
         return relevant_chunks
     
@@ -98,55 +363,74 @@ class RAGPipeline:
         if not chunks:
             return "No relevant property information found."
         
-        context_parts = []
-        for idx, chunk in enumerate(chunks, 1):
-            context_parts.append(f"Property {idx}:")
-            context_parts.append(chunk['text'])
-            context_parts.append("")
+        # Highest scoring chunks claim the token budget first; numbering still
+        # follows retrieval rank so [SOURCE:N] lines up with the returned sources
+        budget = Config.MAX_CONTEXT_TOKENS * CHARS_PER_TOKEN
+        kept = {}
+        for idx, chunk in sorted(enumerate(chunks, 1), key=lambda item: item[1].get('score', 0), reverse=True):
+            text = chunk['text'][:Config.MAX_CHUNK_TOKENS * CHARS_PER_TOKEN]
+            if len(text) > budget:
+                break
+            kept[idx] = text
+            budget -= len(text)
         
-        return "\n".join(context_parts)
+        return "\n".join(f"Property {idx}:\n{kept[idx]}\n" for idx in sorted(kept))
+    
+    def _build_messages(self, query: str, context: str) -> List[ChatCompletionMessageParam]:
+        """Chat messages asking the LLM to answer from the retrieved context"""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT_TEMPLATE.format(context=context, query=query)}
+        ]
     
     def generate_response(self, query: str, context: str, chunks: List[Dict]) -> str:
-        """Generate response using Groq LLM with source mapping"""
-        system_prompt = """You are a real estate assistant. Answer ONLY using the properties provided in the context below. DO NOT make up information.
-
-CRITICAL RULES:
-1. If context has matching properties → List them with details
-2. If context has NO matching properties → Say "No properties found with those criteria" and show what IS available
-3. ALWAYS use actual prices, locations, and amenities from the context
-4. Format each property as ONE bullet point:
-   • **[Type]** in [Location] - ₹[Price] | [BHK] | [Area] | [Amenities] [SOURCE:N]"""
-
-        user_prompt = f"""Available Properties in Database:
-{context}
-
-User Query: {query}
-
-INSTRUCTIONS:
-1. Check if any properties match the user's query
-2. List matching properties with ALL details (price, location, BHK, amenities)
-3. Add [SOURCE:N] at the end of each property line
-4. If NO match found, say so clearly and show what properties ARE available
-
-Answer:"""
-
+        """Generate response using Groq LLM with source mapping
+        
+        Transient Groq errors (timeouts, rate limits, 5xx) are raised so that
+        query() can retry them; any other error is returned as the answer text.
+        """
+        cached = self._disk_get(query, chunks)
+        if cached is not None:
+            return cached
+        
         try:
             chat_completion = self.groq_client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=self._build_messages(query, context),
+                model=Config.GROQ_MODEL,
+                temperature=Config.TEMPERATURE,
+                max_tokens=Config.MAX_TOKENS,
+            )
+            
+            return chat_completion.choices[0].message.content or ""
+            
+        except Exception as e:
+            if _is_transient(e):
+                raise  # the caller's retry loop backs off and tries again
+            return f"Error generating response: {str(e)}"
+    
+    async def agenerate_response(self, query: str, context: str, chunks: List[Dict]) -> str:
+        """Async generate_response on the shared AsyncGroq client"""
+        # The disk cache lookup reads SQLite and may fetch index stats; keep both off the loop
+        cached = await asyncio.to_thread(self._disk_get, query, chunks)
+        if cached is not None:
+            return cached
+        
+        try:
+            chat_completion = await get_async_groq().chat.completions.create(
+                messages=self._build_messages(query, context),
                 model=Config.GROQ_MODEL,
                 temperature=Config.TEMPERATURE,
                 max_tokens=Config.MAX_TOKENS,
             )
             
-            return chat_completion.choices[0].message.content
+            return chat_completion.choices[0].message.content or ""
             
         except Exception as e:
+            if _is_transient(e):
+                raise  # the caller's retry loop backs off and tries again
             return f"Error generating response: {str(e)}"
     
-    def query(self, user_query: str, top_k: int = None, return_chunks: bool = False) -> Dict:
+    def query(self, user_query: str, top_k: Optional[int] = None, return_chunks: bool = False) -> Dict:
         """Complete RAG pipeline with production-grade error handling and validation
         
         Args:
@@ -157,55 +441,215 @@ Answer:"""
         Returns:
             Dict with query results and metadata
         """
-        import time
+        self._validate_query(user_query)
+        self.logger.info(f"🔍 Query received: '{user_query}'")
         
-        # Input validation
-        if not user_query or not isinstance(user_query, str):
-            raise ValueError("Query must be a non-empty string")
+        cache_key = self._cache_key(user_query, top_k)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            self.logger.info("⚡ Served from response cache")
+            return self._from_cache(cached, user_query, return_chunks)
         
-        if len(user_query.strip()) < 3:
-            raise ValueError("Query too short. Please provide more details.")
+        start_time = time.time()
+        
+        # Retrieve with retry logic
+        max_retries = 3
+        try:
+            query_embedding, chunks, similar = self._retrieve_with_retry(user_query, top_k, cache_key, max_retries)
+        except Exception as e:
+            return self._retrieval_failed(user_query, e, max_retries)
+        
+        if similar is not None:
+            return self._from_cache(similar, user_query, return_chunks)
+        
+        self._log_retrieved(chunks)
+        context = self.create_context_from_chunks(chunks)
+        
+        # Generate response with retry logic
+        for retry in range(max_retries):
+            try:
+                response = self.generate_response(user_query, context, chunks)
+                break
+            except Exception as e:
+                if retry == max_retries - 1 or not _is_transient(e):
+                    self.logger.error(f"Generation failed after {retry + 1} attempts: {e}")
+                    response = f"Error generating response: {str(e)}"
+                    break
+                self.logger.warning(f"Retry {retry + 1}/{max_retries} for generation")
+                time.sleep(_retry_delay(retry))
+        
+        return self._finish_query(user_query, response, chunks, time.time() - start_time,
+                                  cache_key, query_embedding, return_chunks)
+    
+    def stream_query(self, user_query: str, top_k: Optional[int] = None) -> Iterator[str]:
+        """query() that yields the answer text as Groq generates it
+        
+        Cache hits and errors are yielded as a single piece; a completed
+        stream is cached just like a query() result.
+        """
+        self._validate_query(user_query)
+        self.logger.info(f"🔍 Query received: '{user_query}'")
+        
+        cache_key = self._cache_key(user_query, top_k)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            self.logger.info("⚡ Served from response cache")
+            yield cached['response']
+            return
+        
+        start_time = time.time()
+        
+        max_retries = 3
+        try:
+            query_embedding, chunks, similar = self._retrieve_with_retry(user_query, top_k, cache_key, max_retries)
+        except Exception as e:
+            yield self._retrieval_failed(user_query, e, max_retries)['response']
+            return
+        
+        if similar is not None:
+            yield similar['response']
+            return
+        
+        self._log_retrieved(chunks)
+        context = self.create_context_from_chunks(chunks)
         
+        parts = []
+        try:
+            answer = self._disk_get(user_query, chunks)
+            stream = [answer] if answer is not None else self.stream_response(user_query, context)
+            for text in stream:
+                parts.append(text)
+                yield text
+        except Exception as e:
+            error = f"Error generating response: {str(e)}"
+            yield ("\n" if parts else "") + error
+            parts = [error]
+        
+        self._finish_query(user_query, "".join(parts), chunks, time.time() - start_time,
+                           cache_key, query_embedding, False)
+    
+    def stream_response(self, query: str, context: str) -> Iterator[str]:
+        """Yield response text from Groq as it is generated"""
+        stream = self.groq_client.chat.completions.create(
+            messages=self._build_messages(query, context),
+            model=Config.GROQ_MODEL,
+            temperature=Config.TEMPERATURE,
+            max_tokens=Config.MAX_TOKENS,
+            stream=True,
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    
+    async def aquery(self, user_query: str, top_k: Optional[int] = None, return_chunks: bool = False) -> Dict:
+        """Async query() for event-loop callers such as the FastAPI app
+        
+        Retrieval runs in worker threads (the Pinecone client is synchronous)
+        while generation awaits AsyncGroq, and retry backoff never blocks the
+        loop. Results and caches are shared with query().
+        """
+        self._validate_query(user_query)
         self.logger.info(f"🔍 Query received: '{user_query}'")
+        
+        cache_key = self._cache_key(user_query, top_k)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            self.logger.info("⚡ Served from response cache")
+            return self._from_cache(cached, user_query, return_chunks)
+        
         start_time = time.time()
         
         # Retrieve with retry logic
         max_retries = 3
-        chunks = None
+        chunks: List[Dict] = []
         
         for retry in range(max_retries):
             try:
-                chunks = self.retrieve_relevant_chunks(user_query, top_k)
+                query_embedding = await asyncio.to_thread(self.embed_batcher.embed, user_query)
+                similar = self._semantic_cache.get(query_embedding, cache_key[1:])
+                if similar is not None:
+                    self.logger.info("⚡ Served from semantic cache")
+                    return self._from_cache(similar, user_query, return_chunks)
+                
+                chunks = await asyncio.to_thread(
+                    self.retrieve_relevant_chunks, user_query, top_k, query_embedding
+                )
                 break
             except Exception as e:
-                if retry == max_retries - 1:
-                    self.logger.error(f"Retrieval failed after {max_retries} retries: {e}")
-                    return {
-                        'query': user_query,
-                        'response': "Sorry, I encountered a database error. Please try again.",
-                        'error': str(e)
-                    }
+                if retry == max_retries - 1 or not _is_transient(e):
+                    return self._retrieval_failed(user_query, e, max_retries)
                 self.logger.warning(f"Retry {retry + 1}/{max_retries} for retrieval")
-                time.sleep(2 ** retry)
+                await asyncio.sleep(_retry_delay(retry))
         
-        self.logger.info(f"✅ Retrieved {len(chunks)} chunks")
-        if chunks:
-            self.logger.info(f"📍 Top match: {chunks[0].get('location', 'N/A')} (score: {chunks[0].get('score', 0):.3f})")
+        self._log_retrieved(chunks)
+        context = self.create_context_from_chunks(chunks)
         
         # Generate response with retry logic
         for retry in range(max_retries):
             try:
-                context = self.create_context_from_chunks(chunks)
-                response = self.generate_response(user_query, context, chunks)
+                response = await self.agenerate_response(user_query, context, chunks)
                 break
             except Exception as e:
-                if retry == max_retries - 1:
-                    self.logger.error(f"Generation failed after {max_retries} retries: {e}")
-                    response = "Sorry, I couldn't generate a response. Please try again."
+                if retry == max_retries - 1 or not _is_transient(e):
+                    self.logger.error(f"Generation failed after {retry + 1} attempts: {e}")
+                    response = f"Error generating response: {str(e)}"
+                    break
                 self.logger.warning(f"Retry {retry + 1}/{max_retries} for generation")
-                time.sleep(2 ** retry)
+                await asyncio.sleep(_retry_delay(retry))
+        
+        # Caching writes to SQLite through diskcache, so it runs in a worker thread too
+        return await asyncio.to_thread(self._finish_query, user_query, response, chunks,
+                                       time.time() - start_time, cache_key, query_embedding, return_chunks)
+    
+    def _retrieve_with_retry(self, user_query: str, top_k: Optional[int], cache_key: Tuple[str, int, str],
+                             max_retries: int) -> Tuple[List[float], List[Dict], Optional[Dict]]:
+        """Embed and retrieve, retrying transient errors with jittered backoff
         
-        elapsed = time.time() - start_time
+        Returns (query_embedding, chunks, similar) where similar is a semantic
+        cache hit, in which case chunks is empty. Raises after the last retry.
+        """
+        for retry in range(max_retries):
+            try:
+                query_embedding = self.embed_batcher.embed(user_query)
+                similar = self._semantic_cache.get(query_embedding, cache_key[1:])
+                if similar is not None:
+                    self.logger.info("⚡ Served from semantic cache")
+                    return query_embedding, [], similar
+                
+                return query_embedding, self.retrieve_relevant_chunks(user_query, top_k, query_embedding), None
+            except Exception as e:
+                if retry == max_retries - 1 or not _is_transient(e):
+                    raise
+                self.logger.warning(f"Retry {retry + 1}/{max_retries} for retrieval")
+                time.sleep(_retry_delay(retry))
+        raise RuntimeError("Retrieval failed: no retries attempted")
+    
+    @staticmethod
+    def _validate_query(user_query: str) -> None:
+        """Reject queries too short to search on"""
+        if not user_query or not isinstance(user_query, str):
+            raise ValueError("Query must be a non-empty string")
+        
+        if len(user_query.strip()) < 3:
+            raise ValueError("Query too short. Please provide more details.")
+    
+    def _retrieval_failed(self, user_query: str, error: Exception, max_retries: int) -> Dict:
+        self.logger.error(f"Retrieval failed after {max_retries} retries: {error}")
+        return {
+            'query': user_query,
+            'response': "Sorry, I encountered a database error. Please try again.",
+            'error': str(error)
+        }
+    
+    def _log_retrieved(self, chunks: List[Dict]) -> None:
+        self.logger.info(f"✅ Retrieved {len(chunks)} chunks")
+        if chunks:
+            self.logger.info(f"📍 Top match: {chunks[0].get('location', 'N/A')} (score: {chunks[0].get('score', 0):.3f})")
+    
+    def _finish_query(self, user_query: str, response: str, chunks: List[Dict], elapsed: float,
+                      cache_key: Tuple[str, int, str], query_embedding: List[float], return_chunks: bool) -> Dict:
+        """Build the result dict and cache it if generation succeeded"""
         self.logger.info(f"⏱️ Query completed in {elapsed:.2f}s")
         
         result = {
@@ -215,16 +659,91 @@ Answer:"""
             'chunks_retrieved': len(chunks)
         }
         
+        # Groq failures reach here as in-band error text once retries are exhausted
+        if not response.startswith("Error generating response"):
+            entry = {**result, 'retrieved_chunks': chunks, 'num_chunks_retrieved': len(chunks)}
+            with self._cache_lock:
+                self._response_cache[cache_key] = entry
+            self._semantic_cache.put(query_embedding, cache_key[1:], entry)
+            if self._disk_cache is not None:
+                key = self._disk_key(user_query, chunks)
+                if key is not None:
+                    self._disk_cache.set(key, response, expire=Config.DISK_CACHE_TTL)
+        
         if return_chunks:
             result['retrieved_chunks'] = chunks
             result['num_chunks_retrieved'] = len(chunks)
         
         return result
     
+    def _disk_key(self, user_query: str, chunks: List[Dict]) -> Optional[str]:
+        """Disk cache key: normalized query, the retrieved chunks and the index version
+        
+        The vector count stands in for the index version, so answers are
+        recomputed once the index changes. None if the count is unavailable.
+        """
+        try:
+            index_version = self._index_stats().get('total_vector_count', 0)
+        except Exception as e:
+            self.logger.warning(f"Skipping disk cache, index stats unavailable: {e}")
+            return None
+        digest = hashlib.blake2b(normalize_query(user_query).encode())
+        for chunk in sorted(chunks, key=lambda c: (c.get('url', ''), c.get('text', ''))):
+            digest.update(b"|" + chunk.get('url', '').encode() + b"\0" + chunk.get('text', '').encode())
+        digest.update(f"|v{index_version}".encode())
+        return digest.hexdigest()
+    
+    def _disk_get(self, user_query: str, chunks: List[Dict]) -> Optional[str]:
+        """Previously generated answer for this query and context, if persisted"""
+        if self._disk_cache is None:
+            return None
+        key = self._disk_key(user_query, chunks)
+        response = self._disk_cache.get(key) if key is not None else None
+        if response is not None:
+            self.logger.info("⚡ Answer served from disk cache")
+        return response
+    
+    def _cached_response(self, cache_key: Tuple[str, int, str]) -> Optional[Dict]:
+        with self._cache_lock:
+            return self._response_cache.get(cache_key)
+    
+    @staticmethod
+    def _from_cache(cached: Dict, user_query: str, return_chunks: bool) -> Dict:
+        """Copy of a cached result, marked as a hit"""
+        result = copy.deepcopy(cached)
+        result['query'] = user_query
+        result['response_time'] = "0.00s"
+        result['cache_hit'] = True
+        if not return_chunks:
+            result.pop('retrieved_chunks', None)
+            result.pop('num_chunks_retrieved', None)
+        return result
+    
+    @staticmethod
+    def _cache_key(user_query: str, top_k: Optional[int] = None) -> Tuple[str, int, str]:
+        """Response cache key: normalized query hash, top_k and the Pinecone filter
+        
+        The last two elements are the semantic cache scope, so near-duplicate
+        queries with different price caps or localities never share an answer.
+        """
+        query_hash = hashlib.blake2b(normalize_query(user_query).encode()).hexdigest()
+        return query_hash, top_k or Config.TOP_K_RESULTS, filter_key(query_filter(user_query))
+    
+    def _index_stats(self) -> Any:
+        """describe_index_stats, reused for INDEX_STATS_TTL seconds"""
+        with self._stats_lock:
+            if self._stats is None or time.monotonic() >= self._stats_expiry:
+                first = self._stats is None
+                self._stats = self.index.describe_index_stats()
+                self._stats_expiry = time.monotonic() + INDEX_STATS_TTL
+                if first and self._stats.get('total_vector_count', 0) == 0:
+                    self.logger.warning("⚠️  Index is empty. Run data_pipeline.py to populate it.")
+            return self._stats
+    
     def get_index_stats(self) -> Dict:
         """Get statistics about the Pinecone index"""
         try:
-            stats = self.index.describe_index_stats()
+            stats = self._index_stats()
             return {
                 'total_vectors': stats.get('total_vector_count', 0),
                 'index_name': Config.PINECONE_INDEX_NAME,
@@ -233,6 +752,20 @@ Answer:"""
             return {'error': str(e)}
 
 
+_pipeline: Optional[RAGPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> RAGPipeline:
+    """Process-wide RAGPipeline, built on first use; a failed build is retried on the next call"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = RAGPipeline()
+    return _pipeline
+
+
 # ============================================================================
 # CLI CHATBOT
 # ============================================================================
@@ -240,14 +773,21 @@ Answer:"""
 class ChatbotCLI:
     """Command-line interface for the property chatbot"""
     
-    def __init__(self):
+    def __init__(self) -> None:
         print("🏠 Magicbricks Property Chatbot")
         print("=" * 60)
         print("Initializing chatbot...")
         
         try:
-            self.rag = RAGPipeline()
-            self.conversation_history = []
+            self.rag = get_pipeline()
+            self.conversation_history: List[Dict] = []
+            # Command word -> handler; a handler returning True ends the session
+            self._commands: Dict[str, Callable[[], Optional[bool]]] = {
+                'quit': self._quit, 'exit': self._quit, 'q': self._quit,
+                'stats': self.display_stats,
+                'clear': self._clear_history,
+                'help': self.display_welcome_message, 'h': self.display_welcome_message,
+            }
             
             stats = self.rag.get_index_stats()
             print(f"✅ Connected to database with {stats.get('total_vectors', 0)} properties")
@@ -260,7 +800,7 @@ class ChatbotCLI:
             print("2. You have run: python data_pipeline.py")
             sys.exit(1)
     
-    def display_welcome_message(self):
+    def display_welcome_message(self) -> None:
         """Display welcome message"""
         print("\n👋 Welcome! I can help you find properties on Magicbricks.")
         print("\n💡 Example queries:")
@@ -275,7 +815,7 @@ class ChatbotCLI:
         print("   • 'clear' to clear history")
         print("=" * 60)
     
-    def display_stats(self):
+    def display_stats(self) -> None:
         """Display statistics"""
         stats = self.rag.get_index_stats()
         print("\n📊 Database Statistics:")
@@ -284,27 +824,41 @@ class ChatbotCLI:
         print(f"   Queries in this session: {len(self.conversation_history)}")
         print()
     
-    def process_query(self, query: str):
+    def _clear_history(self) -> None:
+        self.conversation_history = []
+        print("\n✅ Conversation history cleared")
+    
+    @staticmethod
+    def _quit() -> bool:
+        print("\n👋 Thank you for using Magicbricks Chatbot. Goodbye!")
+        return True
+    
+    def process_query(self, query: str) -> None:
         """Process user query"""
         print("\n🔍 Searching properties...")
         
         try:
-            result = self.rag.query(query, return_chunks=False)
+            print("\n💬 Assistant:")
+            print("-" * 60)
+            
+            # Print the answer as it streams in rather than after generation finishes
+            parts = []
+            for text in self.rag.stream_query(query):
+                parts.append(text)
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            print()
+            print("-" * 60)
             
             self.conversation_history.append({
                 'query': query,
-                'response': result['response']
+                'response': "".join(parts)
             })
             
-            print("\n💬 Assistant:")
-            print("-" * 60)
-            print(result['response'])
-            print("-" * 60)
-            
         except Exception as e:
             print(f"\n❌ Error processing query: {e}")
     
-    def run(self):
+    def run(self) -> None:
         """Main chatbot loop"""
         self.display_welcome_message()
         
@@ -315,21 +869,10 @@ class ChatbotCLI:
                 if not user_input:
                     continue
                 
-                if user_input.lower() in ['quit', 'exit', 'q']:
-                    print("\n👋 Thank you for using Magicbricks Chatbot. Goodbye!")
-                    break
-                
-                elif user_input.lower() == 'stats':
-                    self.display_stats()
-                    continue
-                
-                elif user_input.lower() == 'clear':
-                    self.conversation_history = []
-                    print("\n✅ Conversation history cleared")
-                    continue
-                
-                elif user_input.lower() in ['help', 'h']:
-                    self.display_welcome_message()
+                handler = self._commands.get(user_input.lower())
+                if handler is not None:
+                    if handler():
+                        break
                     continue
                 
                 self.process_query(user_input)
@@ -345,13 +888,13 @@ class ChatbotCLI:
 # TEST FUNCTION
 # ============================================================================
 
-def test_rag_pipeline():
+def test_rag_pipeline() -> None:
     """Test the RAG pipeline"""
     print("🤖 Testing Magicbricks RAG Pipeline")
     print("=" * 50)
     
     try:
-        rag = RAGPipeline()
+        rag = get_pipeline()
         
         stats = rag.get_index_stats()
         print(f"\n📊 Index Stats:")
@@ -368,11 +911,13 @@ def test_rag_pipeline():
         print("Testing Sample Queries:")
         print("=" * 50)
         
-        for query in test_queries:
+        # Queries are independent, so run them concurrently and print in order
+        with ThreadPoolExecutor(max_workers=len(test_queries)) as executor:
+            results = list(executor.map(lambda q: rag.query(q, return_chunks=False), test_queries))
+        
+        for query, result in zip(test_queries, results):
             print(f"\n🔍 Query: {query}")
             print("-" * 50)
-            
-            result = rag.query(query, return_chunks=False)
             print(f"💬 Response:\n{result['response']}")
             print()
         
@@ -390,10 +935,8 @@ def test_rag_pipeline():
 # MAIN
 # ============================================================================
 
-def main():
+def main() -> None:
     """Main function"""
-    import sys
-    
     if len(sys.argv) > 1 and sys.argv[1] == '--test':
         test_rag_pipeline()
     else: